@@ -1,163 +1,499 @@
 import tkinter as tk
 import random
 import math
+import argparse
+import collections
+import concurrent.futures
+import functools
+import os
+import time
 
-def create_chase_animation():
+try:
+    import numpy as np
+except ImportError:
+    np = None # The many-agent swarm needs NumPy
+
+# --- Chase Simulation ---
+# Sizes and speeds of the two animals and the arena they run in. Positions are
+# the top-left corners of their bounding boxes.
+ChaseConfig = collections.namedtuple('ChaseConfig', [
+    'width', 'height', # Arena (canvas) size
+    'mouse_width', 'mouse_height', 'mouse_speed', # Chased Mouse: random walk, up to mouse_speed per axis per tick
+    'cat_width', 'cat_height', 'cat_speed', # Chasing CAT: moves cat_speed per tick towards the Mouse
+])
+DEFAULT_CONFIG = ChaseConfig(780, 580, 60, 60, 10, 100, 100, 20)
+ChaseState = collections.namedtuple('ChaseState', ['mouse_x', 'mouse_y', 'cat_x', 'cat_y'])
+MAX_TICKS = 100_000 # A chase still running after this many ticks counts as an escape
+TICK_SECONDS = 0.05 # Animation tick (50 ms), used to report ticks as seconds
+
+def initial_state(config, rng):
+    """Places the Mouse in the left half and the CAT in the right half of the arena."""
+    return ChaseState(
+        rng.randint(20, config.width // 2 - config.mouse_width - 20),
+        rng.randint(20, config.height - config.mouse_height - 20),
+        rng.randint(config.width // 2, config.width - config.cat_width - 20),
+        rng.randint(20, config.height - config.cat_height - 20),
+    )
+
+def chase_step(state, config, rng):
     """
-    Creates a Tkinter window with a canvas and animates a CAT chasing a Mouse.
-    The 'chased' Mouse moves randomly, and the 'chasing' CAT moves towards it.
-    The animation stops when the chasing CAT "catches" the chased Mouse.
+    Advances the chase by one tick and returns (next state, caught). The Mouse
+    takes a random step (bouncing off the edges), then the CAT moves towards
+    the Mouse's new centre. caught tests the positions at the start of the tick.
     """
-    # --- Setup the main window ---
-    root = tk.Tk()
-    root.title("Mouse and CAT Chase") # Updated title
-    root.geometry("800x600") # Larger window for the chase scene
-    root.resizable(False, False) # Prevent resizing for simpler coordinate management
+    e_x1, e_y1, d_x1, d_y1 = state
+    e_x2, e_y2 = e_x1 + config.mouse_width, e_y1 + config.mouse_height
+    d_x2, d_y2 = d_x1 + config.cat_width, d_y1 + config.cat_height
 
-    # --- Create the canvas ---
-    # Use fixed dimensions for canvas, which are then used for calculations
-    CANVAS_WIDTH = 780 
-    CANVAS_HEIGHT = 580
-    canvas = tk.Canvas(root, width=CANVAS_WIDTH, height=CANVAS_HEIGHT, bg="#E0FFFF", bd=2, relief="groove") # Light cyan background for a techy feel
-    canvas.pack(pady=10)
+    # --- Chased Mouse Random Movement ---
+    e_dx = rng.uniform(-config.mouse_speed, config.mouse_speed)
+    e_dy = rng.uniform(-config.mouse_speed, config.mouse_speed)
 
-    # --- Object Properties ---
-    # Chased Mouse properties (formerly CAT)
-    chased_object_width = 60 # Swapped width
-    chased_object_height = 60 # Swapped height
-    chased_object_color = "red" # Swapped color
-    chased_object_speed = 10 # Swapped speed
+    # Keep chased Mouse within canvas boundaries
+    if e_x1 + e_dx < 0: e_dx = abs(e_dx)
+    if e_x2 + e_dx > config.width: e_dx = -abs(e_dx)
+    if e_y1 + e_dy < 0: e_dy = abs(e_dy)
+    if e_y2 + e_dy > config.height: e_dy = -abs(e_dy)
 
-    # Chasing CAT properties (formerly Mouse)
-    chasing_object_width = 100 # Swapped width
-    chasing_object_height = 100 # Swapped height
-    chasing_object_color = "blue" # Swapped color
-    chasing_object_speed = 20 # Swapped speed
+    # --- Chasing CAT Logic ---
+    # Direction vector from chasing CAT to chased Mouse (centre to centre)
+    dir_x = (e_x1 + e_x2) / 2 + e_dx - (d_x1 + d_x2) / 2
+    dir_y = (e_y1 + e_y2) / 2 + e_dy - (d_y1 + d_y2) / 2
+    distance = math.sqrt(dir_x**2 + dir_y**2)
 
-    # --- Initial Positions ---
-    # Place chased Mouse randomly in the middle-left part of the canvas (formerly CAT's initial position)
-    initial_chased_object_x = random.randint(20, CANVAS_WIDTH // 2 - chased_object_width - 20)
-    initial_chased_object_y = random.randint(20, CANVAS_HEIGHT - chased_object_height - 20)
+    # Move chasing CAT towards chased Mouse if not too close
+    if distance > config.cat_speed:
+        # Normalize direction vector and multiply by chasing CAT speed
+        move_x = (dir_x / distance) * config.cat_speed
+        move_y = (dir_y / distance) * config.cat_speed
+    else:
+        move_x, move_y = 0, 0 # Stop moving if very close, collision will handle it
 
-    # Place chasing CAT randomly in the middle-right part of the canvas (formerly Mouse's initial position)
-    initial_chasing_object_x = random.randint(CANVAS_WIDTH // 2, CANVAS_WIDTH - chasing_object_width - 20)
-    initial_chasing_object_y = random.randint(20, CANVAS_HEIGHT - chasing_object_height - 20)
+    # Keep chasing CAT within canvas boundaries (simple bounce if hits edge)
+    if d_x1 + move_x < 0 or d_x2 + move_x > config.width:
+        move_x = -move_x
+    if d_y1 + move_y < 0 or d_y2 + move_y > config.height:
+        move_y = -move_y
 
-    # --- Create Canvas Objects ---
-    # Chased Mouse
-    chased_object_id = canvas.create_rectangle(
-        initial_chased_object_x, initial_chased_object_y,
-        initial_chased_object_x + chased_object_width, initial_chased_object_y + chased_object_height,
-        fill=chased_object_color, outline="darkred", width=2, tags="chased_object" # Swapped outline
-    )
-    chased_object_text_id = canvas.create_text(
-        initial_chased_object_x + chased_object_width / 2, initial_chased_object_y + chased_object_height / 2,
-        text="Mouse", fill="white", font=("Arial", 10, "bold"), tags="chased_object_text" # Changed to Mouse
-    )
+    # --- Collision Detection (AABB) ---
+    caught = d_x1 < e_x2 and d_x2 > e_x1 and d_y1 < e_y2 and d_y2 > e_y1
+    return ChaseState(e_x1 + e_dx, e_y1 + e_dy, d_x1 + move_x, d_y1 + move_y), caught
 
-    # Chasing CAT
-    chasing_object_id = canvas.create_rectangle(
-        initial_chasing_object_x, initial_chasing_object_y,
-        initial_chasing_object_x + chasing_object_width, initial_chasing_object_y + chasing_object_height,
-        fill=chasing_object_color, outline="darkblue", width=2, tags="chasing_object" # Swapped outline
-    )
-    chasing_object_text_id = canvas.create_text(
-        initial_chasing_object_x + chasing_object_width / 2, initial_chasing_object_y + chasing_object_height / 2,
-        text="CAT", fill="white", font=("Arial", 10, "bold"), tags="chasing_object_text" # Changed to CAT
-    )
+def simulate_chase(seed, config=DEFAULT_CONFIG, max_ticks=MAX_TICKS):
+    """Runs one seeded chase without any window; returns the tick the CAT caught the Mouse on, or None."""
+    rng = random.Random(seed)
+    state = initial_state(config, rng)
+    for tick in range(max_ticks):
+        state, caught = chase_step(state, config, rng)
+        if caught:
+            return tick
+    return None
 
-    # --- Game State Variables ---
-    game_over = False
-    animation_delay = 50 # Milliseconds between frames (20 FPS)
+# --- Swarm Simulation ---
+SWARM_CHUNK_PAIRS = 1 << 20 # Cat/mouse pairs evaluated per array operation, bounding temporary memory
+GRID_MIN_PAIRS = 500_000 # Below this many cat/mouse pairs checking them all is cheaper than the grid
+GRID_POINTS_PER_CELL = 8 # Mice per grid cell the spatial index is sized for (on average)
 
-    # --- Helper Function to get object center coordinates ---
-    def get_center(obj_id):
-        coords = canvas.coords(obj_id)
-        if not coords: return 0, 0 # Handle case where object might be deleted
-        x1, y1, x2, y2 = coords
-        return (x1 + x2) / 2, (y1 + y2) / 2
+class UniformGrid:
+    """
+    Uniform-grid spatial index over points in the arena (the mice's centres).
+    Point indices are kept sorted by cell, with cell_start marking where each
+    cell's run begins, so a cell's points are one slice. update() re-sorts the
+    previous order rather than starting over: agents move a fraction of a cell
+    per tick, so the order is almost sorted already and the stable sort
+    (timsort) only has to patch up the few points that changed cell.
+    """
+    def __init__(self, width, height, cell_size, count):
+        self.cell_size = cell_size
+        self.cols = max(1, math.ceil(width / cell_size))
+        self.rows = max(1, math.ceil(height / cell_size))
+        self.order = np.arange(count)
+        self.cell_start = np.zeros(self.cols * self.rows + 2, int)
+        self.points = np.zeros((count, 2))
 
-    # --- Animation Function ---
-    def animate_chase():
-        nonlocal game_over
+    def _cell_xy(self, points):
+        cx = np.clip((points[:, 0] // self.cell_size).astype(int), 0, self.cols - 1)
+        cy = np.clip((points[:, 1] // self.cell_size).astype(int), 0, self.rows - 1)
+        return cx, cy
 
-        if game_over:
-            return # Stop the animation
+    def update(self, points, active):
+        """Re-files all points; inactive ones go to a sentinel cell that no query looks at."""
+        self.points = points
+        cx, cy = self._cell_xy(points)
+        cells = np.where(active, cy * self.cols + cx, self.cols * self.rows)
+        keys = cells[self.order]
+        resort = np.argsort(keys, kind='stable')
+        self.order = self.order[resort]
+        self.cell_start = np.searchsorted(keys[resort], np.arange(self.cols * self.rows + 2))
 
-        # Get current positions
-        chased_object_coords = canvas.coords(chased_object_id)
-        chasing_object_coords = canvas.coords(chasing_object_id)
+    def _pairs(self, owners, cx, cy, offsets):
+        """
+        Expands queries (owner, cell cx, cy) into (owner, point) pairs for every
+        point in the cells at the given (dx, dy) offsets from each query's cell.
+        """
+        dx, dy = np.array(offsets).T
+        owners = np.repeat(owners, len(offsets))
+        cx = np.repeat(cx, len(offsets)) + np.tile(dx, len(cx))
+        cy = np.repeat(cy, len(offsets)) + np.tile(dy, len(cy))
+        inside = (cx >= 0) & (cx < self.cols) & (cy >= 0) & (cy < self.rows)
+        owners, cells = owners[inside], (cy * self.cols + cx)[inside]
+        start = self.cell_start[cells]
+        counts = self.cell_start[cells + 1] - start
+        run_offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        return np.repeat(owners, counts), self.order[np.repeat(start, counts) + run_offset]
 
-        if not chased_object_coords or not chasing_object_coords: # Check if objects still exist
-            return
+    def overlapping(self, centres, half):
+        """
+        Returns (query index, point index) pairs where the point lies closer than
+        half (per axis) to the query centre, i.e. where the boxes overlap.
+        """
+        reach_x = math.ceil(half[0] / self.cell_size)
+        reach_y = math.ceil(half[1] / self.cell_size)
+        cx, cy = self._cell_xy(centres)
+        offsets = [(dx, dy) for dx in range(-reach_x, reach_x + 1) for dy in range(-reach_y, reach_y + 1)]
+        query, point = self._pairs(np.arange(len(centres)), cx, cy, offsets)
+        offset = np.abs(self.points[point] - centres[query])
+        overlap = (offset[:, 0] < half[0]) & (offset[:, 1] < half[1])
+        return query[overlap], point[overlap]
 
-        e_x1, e_y1, e_x2, e_y2 = chased_object_coords
-        d_x1, d_y1, d_x2, d_y2 = chasing_object_coords
+    def nearest(self, centres):
+        """
+        Returns the index of the nearest active point to each centre (-1 if there
+        are none). Some point lies no farther from a centre than the far corner
+        of any occupied cell, so the smallest such distance bounds the search:
+        only points in occupied cells whose near edge is within that bound are
+        compared. Cell distances are split into an x and a y part per column
+        and row, so the per-cell work is a gather and an add.
+        """
+        best = np.full(len(centres), -1)
+        counts = np.diff(self.cell_start[:self.cols * self.rows + 1])
+        occupied = np.flatnonzero(counts)
+        if not len(occupied): # Every point is inactive
+            return best
+        occupied_col, occupied_row = occupied % self.cols, occupied // self.cols
+        size = np.float32(self.cell_size)
+        col_edges = np.arange(self.cols, dtype=np.float32) * size
+        row_edges = np.arange(self.rows, dtype=np.float32) * size
 
-        # --- Chased Mouse Random Movement ---
-        # Generate small random movement for chased Mouse
-        e_dx = random.uniform(-chased_object_speed, chased_object_speed)
-        e_dy = random.uniform(-chased_object_speed, chased_object_speed)
+        def axis_distances(coords, edges):
+            """Squared distances along one axis from each coordinate to the near and far edge of each cell."""
+            before = edges[None, :] - coords[:, None] # Positive where the cell starts after the coordinate
+            after = -before - size # Positive where the cell ends before it
+            near = np.maximum(np.maximum(before, after), 0)
+            far = np.maximum(-before, before + size)
+            return near * near, far * far
 
-        # Calculate next chased Mouse position
-        next_e_x1, next_e_y1 = e_x1 + e_dx, e_y1 + e_dy
-        next_e_x2, next_e_y2 = e_x2 + e_dx, e_y2 + e_dy
+        # Query chunks small enough for the (query, occupied cell) arrays to stay in cache
+        chunk = max(1, SWARM_CHUNK_PAIRS // 4 // len(occupied))
+        for start in range(0, len(centres), chunk):
+            query_x, query_y = centres[start:start + chunk].T.astype(np.float32)
+            near_x, far_x = axis_distances(query_x, col_edges)
+            near_y, far_y = axis_distances(query_y, row_edges)
+            bound = (far_x[:, occupied_col] + far_y[:, occupied_row]).min(axis=1)
+            query, cell = np.nonzero(near_x[:, occupied_col] + near_y[:, occupied_row] <= bound[:, None])
+            cell = occupied[cell]
+            first_point = self.cell_start[cell]
+            cell_counts = counts[cell]
+            run_offset = np.arange(cell_counts.sum()) - np.repeat(np.cumsum(cell_counts) - cell_counts, cell_counts)
+            query = np.repeat(query + start, cell_counts)
+            point = self.order[np.repeat(first_point, cell_counts) + run_offset]
+            delta = self.points[point] - centres[query]
+            d2 = np.einsum('pk,pk->p', delta, delta)
+            # Pairs come out grouped by query, so each query's closest point is
+            # the first pair equal to its group's minimum
+            group_start = np.flatnonzero(np.r_[True, query[1:] != query[:-1]])
+            group_min = np.minimum.reduceat(d2, group_start)
+            hits = np.flatnonzero(d2 == np.repeat(group_min, np.diff(np.r_[group_start, len(query)])))
+            first = hits[np.r_[True, query[hits[1:]] != query[hits[:-1]]]]
+            best[query[first]] = point[first]
+        return best
 
-        # Keep chased Mouse within canvas boundaries
-        if next_e_x1 < 0: e_dx = abs(e_dx)
-        if next_e_x2 > CANVAS_WIDTH: e_dx = -abs(e_dx)
-        if next_e_y1 < 0: e_dy = abs(e_dy)
-        if next_e_y2 > CANVAS_HEIGHT: e_dy = -abs(e_dy)
+class Swarm:
+    """
+    Many-agent chase: N cats and M mice whose positions (top-left corners) and
+    last-tick velocities live in NumPy arrays. Each tick is a handful of batched
+    array operations following the same rules as chase_step: mice random-walk
+    and bounce off the edges, every cat heads for the nearest mouse still
+    running, and a mouse is caught when a cat's box overlaps its box at the
+    start of the tick. Caught mice stay where they are and drop out.
 
-        canvas.move(chased_object_id, e_dx, e_dy)
-        canvas.move(chased_object_text_id, e_dx, e_dy)
+    With spatial_index (the default), catches and nearest-mouse targeting are
+    answered by a UniformGrid of the mice, so crowded scenes only look at
+    nearby pairs; otherwise every cat/mouse pair is evaluated. Ticks with fewer
+    than GRID_MIN_PAIRS pairs check them all anyway, as that is cheaper.
+    """
+    def __init__(self, cats, mice, config=DEFAULT_CONFIG, seed=None, spatial_index=True):
+        self.config = config
+        self.rng = np.random.default_rng(seed)
+        self.bounds = np.array([config.width, config.height], float)
+        self.mouse_size = np.array([config.mouse_width, config.mouse_height], float)
+        self.cat_size = np.array([config.cat_width, config.cat_height], float)
+        # Like initial_state: mice start in the left half, cats in the right half
+        self.mouse_pos = self.rng.uniform([20, 20], [config.width // 2 - config.mouse_width - 20,
+                                                     config.height - config.mouse_height - 20], (mice, 2))
+        self.cat_pos = self.rng.uniform([config.width // 2, 20], [config.width - config.cat_width - 20,
+                                                                  config.height - config.cat_height - 20], (cats, 2))
+        self.mouse_vel = np.zeros((mice, 2))
+        self.cat_vel = np.zeros((cats, 2))
+        self.mouse_alive = np.ones(mice, bool)
+        self.ticks = 0
+        # Cells hold a few mice each on average, so the nearest-mouse search only
+        # compares a handful of cells per cat. They are no smaller than a quarter
+        # of the catch distance, which caps a catch test at 9 x 9 cells.
+        cell_size = max(min(self.cat_size + self.mouse_size) / 2 / 4,
+                        math.sqrt(config.width * config.height * GRID_POINTS_PER_CELL / max(1, mice)))
+        self.grid = UniformGrid(config.width, config.height, cell_size, mice) if spatial_index else None
 
-        # --- Chasing CAT Logic ---
-        d_center_x, d_center_y = get_center(chasing_object_id)
-        e_center_x, e_center_y = get_center(chased_object_id)
+    def mice_left(self):
+        return int(self.mouse_alive.sum())
 
-        # Calculate direction vector from chasing CAT to chased Mouse
-        dir_x = e_center_x - d_center_x
-        dir_y = e_center_y - d_center_y
+    def step(self):
+        """Advances every agent by one tick; returns the number of mice caught."""
+        config = self.config
+        running = np.flatnonzero(self.mouse_alive)
 
-        # Calculate distance
-        distance = math.sqrt(dir_x**2 + dir_y**2)
+        # --- Mice Random Walk ---
+        # Mice do not react to cats, so their whole move is known before any pair is looked at
+        mouse_d = self.rng.uniform(-config.mouse_speed, config.mouse_speed, (len(running), 2))
+        pos = self.mouse_pos[running]
+        mouse_d = np.where(pos + mouse_d < 0, np.abs(mouse_d), mouse_d)
+        mouse_d = np.where(pos + mouse_d + self.mouse_size > self.bounds, -np.abs(mouse_d), mouse_d)
+
+        # --- Catch Test and Targeting ---
+        if not len(running):
+            caught, target = np.zeros(0, bool), np.zeros_like(self.cat_pos)
+        elif self.grid is not None and len(running) * len(self.cat_pos) > GRID_MIN_PAIRS:
+            caught, target = self._catch_and_target_grid(running, mouse_d)
+        else:
+            caught, target = self._catch_and_target_all_pairs(running, pos, mouse_d)
 
-        # Move chasing CAT towards chased Mouse if not too close
-        if distance > chasing_object_speed: # Move only if not already on top of chased object
-            # Normalize direction vector and multiply by chasing CAT speed
-            move_x = (dir_x / distance) * chasing_object_speed
-            move_y = (dir_y / distance) * chasing_object_speed
+        # --- Cat Pursuit ---
+        if len(running):
+            distance = np.sqrt(np.einsum('ck,ck->c', target, target))[:, None]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                cat_d = np.where(distance > config.cat_speed, target / distance * config.cat_speed, 0.0)
+            # Simple bounce if a cat would leave the arena
+            next_pos = self.cat_pos + cat_d
+            cat_d = np.where((next_pos < 0) | (next_pos + self.cat_size > self.bounds), -cat_d, cat_d)
         else:
-            move_x, move_y = 0, 0 # Stop moving if very close, collision will handle it
+            cat_d = np.zeros_like(self.cat_pos)
+
+        self.mouse_vel[:] = 0
+        self.mouse_vel[running] = mouse_d
+        self.mouse_pos[running] += mouse_d
+        self.cat_vel = cat_d
+        self.cat_pos += cat_d
+        self.mouse_alive[running[caught]] = False
+        self.ticks += 1
+        return int(caught.sum())
+
+    def _catch_and_target_grid(self, running, mouse_d):
+        """Catch test at the start of the tick, then nearest-mouse targeting on the mice's new centres."""
+        half = (self.cat_size + self.mouse_size) / 2
+        cat_centre = self.cat_pos + self.cat_size / 2
+        mouse_centre = self.mouse_pos + self.mouse_size / 2
+        self.grid.update(mouse_centre, self.mouse_alive)
+        caught = np.zeros(len(self.mouse_pos), bool)
+        caught[self.grid.overlapping(cat_centre, half)[1]] = True
+
+        # Cats chase the mice's new centres, as in chase_step
+        mouse_centre[running] += mouse_d
+        self.grid.update(mouse_centre, self.mouse_alive)
+        nearest = self.grid.nearest(cat_centre)
+        target = np.where(nearest[:, None] >= 0, mouse_centre[nearest] - cat_centre, 0.0)
+        return caught[running], target
+
+    def _catch_and_target_all_pairs(self, running, pos, mouse_d):
+        """The same as _catch_and_target_grid, evaluating every cat/mouse pair in chunks of cats."""
+        # Pair arrays are float32 and updated in place to keep memory traffic down
+        half_x, half_y = (self.cat_size + self.mouse_size) / 2
+        mouse_cx, mouse_cy = (pos + self.mouse_size / 2).T.astype(np.float32)
+        mouse_dx, mouse_dy = mouse_d.T.astype(np.float32)
+        cat_cx, cat_cy = (self.cat_pos + self.cat_size / 2).T.astype(np.float32)
+        caught = np.zeros(len(running), bool)
+        target = np.zeros((len(self.cat_pos), 2))
+        chunk = max(1, SWARM_CHUNK_PAIRS // max(1, len(running)))
+        for start in range(0, len(self.cat_pos) if len(running) else 0, chunk):
+            rows = slice(start, start + chunk)
+            # Centre offsets from each cat to each running mouse, at the start of the tick
+            dx = mouse_cx[None, :] - cat_cx[rows, None]
+            dy = mouse_cy[None, :] - cat_cy[rows, None]
+            # AABB overlap of the boxes is |centre offset| < half the summed sizes on both axes
+            caught |= ((np.abs(dx) < half_x) & (np.abs(dy) < half_y)).any(axis=0)
+            # Cats chase the mice's new centres, as in chase_step
+            dx += mouse_dx
+            dy += mouse_dy
+            nearest = (dx * dx + dy * dy).argmin(axis=1)
+            cat_rows = np.arange(len(nearest))
+            target[rows, 0] = dx[cat_rows, nearest]
+            target[rows, 1] = dy[cat_rows, nearest]
+        return caught, target
+
+def bench_swarm(cats, mice, ticks, seed=None, config=DEFAULT_CONFIG, spatial_index=True):
+    """Runs a swarm headless and prints per-tick compute time percentiles and how many mice were caught."""
+    swarm = Swarm(cats, mice, config, seed, spatial_index)
+    tick_times = []
+    start = time.perf_counter()
+    for tick in range(ticks):
+        tick_start = time.perf_counter()
+        swarm.step()
+        tick_times.append(time.perf_counter() - tick_start)
+        if not swarm.mice_left():
+            break
+    elapsed = time.perf_counter() - start
+    tick_times.sort()
+    index = "grid" if swarm.grid is not None else "all pairs"
+    print(f"{cats} cats, {mice} mice ({index}): {len(tick_times)} ticks in {elapsed:.2f}s, "
+          f"{mice - swarm.mice_left()} mice caught, {swarm.mice_left()} left")
+    print("tick time ms: " + "  ".join(
+        f"{name} {percentile(tick_times, pct) * 1000:.2f}"
+        for name, pct in (("p50", 50), ("p95", 95), ("p99", 99), ("max", 100))) +
+          f"  (real time needs < {TICK_SECONDS * 1000:.0f})")
+
+# --- Batch Runner ---
+def run_batch(config, runs, first_seed=0, workers=None, max_ticks=MAX_TICKS):
+    """Runs chases with seeds first_seed .. first_seed + runs - 1 across a process pool; returns their results in seed order."""
+    workers = workers or os.cpu_count() or 1
+    simulate = functools.partial(simulate_chase, config=config, max_ticks=max_ticks)
+    seeds = range(first_seed, first_seed + runs)
+    # Large chunks keep the per-task pickling overhead small next to the (short) chases
+    chunksize = max(1, runs // (workers * 4))
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        return list(executor.map(simulate, seeds, chunksize=chunksize))
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def summarize_catch_times(results):
+    """Returns a dict of catch-rate and time-to-catch statistics (in ticks) for a batch."""
+    ticks = sorted(tick for tick in results if tick is not None)
+    summary = {'runs': len(results), 'caught': len(ticks)}
+    if ticks:
+        summary['mean'] = sum(ticks) / len(ticks)
+        for name, pct in (('p50', 50), ('p90', 90), ('p99', 99), ('max', 100)):
+            summary[name] = percentile(ticks, pct)
+    return summary
+
+def print_histogram(results, bins=20, width=50):
+    """Prints a text histogram of the time-to-catch distribution."""
+    ticks = [tick for tick in results if tick is not None]
+    if not ticks:
+        return
+    low, high = min(ticks), max(ticks)
+    bin_size = max(1, math.ceil((high - low + 1) / bins))
+    counts = collections.Counter((tick - low) // bin_size for tick in ticks)
+    peak = max(counts.values())
+    for b in range(max(counts) + 1):
+        start = low + b * bin_size
+        bar = "#" * round(counts[b] / peak * width)
+        print(f"{start:>7}-{start + bin_size - 1:<7}{counts[b]:>7} {bar}")
+
+def run_study(runs, cat_speeds, mouse_speeds, cat_sizes, mouse_sizes, first_seed=0, workers=None, histogram=False):
+    """Runs a batch for every combination of the given speeds and sizes and prints a table of catch times."""
+    print(f"{'cat spd':>8}{'mouse spd':>10}{'cat size':>9}{'mouse size':>11}{'caught':>9}"
+          f"{'mean':>9}{'p50':>7}{'p90':>7}{'p99':>7}{'max':>7}  (ticks of {TICK_SECONDS * 1000:.0f} ms)")
+    start = time.perf_counter()
+    for cat_speed in cat_speeds:
+        for mouse_speed in mouse_speeds:
+            for cat_size in cat_sizes:
+                for mouse_size in mouse_sizes:
+                    config = DEFAULT_CONFIG._replace(cat_speed=cat_speed, mouse_speed=mouse_speed,
+                                                     cat_width=cat_size, cat_height=cat_size,
+                                                     mouse_width=mouse_size, mouse_height=mouse_size)
+                    results = run_batch(config, runs, first_seed, workers)
+                    summary = summarize_catch_times(results)
+                    row = f"{cat_speed:>8}{mouse_speed:>10}{cat_size:>9}{mouse_size:>11}" \
+                          f"{summary['caught'] / summary['runs']:>9.1%}"
+                    if summary['caught']:
+                        row += f"{summary['mean']:>9.1f}" + "".join(
+                            f"{summary[name]:>7}" for name in ('p50', 'p90', 'p99', 'max'))
+                    print(row)
+                    if histogram:
+                        print_histogram(results)
+    print(f"Done in {time.perf_counter() - start:.2f}s")
 
-        # Calculate next chasing CAT position
-        next_d_x1, next_d_y1 = d_x1 + move_x, d_y1 + move_y
-        next_d_x2, next_d_y2 = d_x2 + move_x, d_y2 + move_y
+# --- Animation ---
+# The simulation state lives in Python (ChaseState / Swarm arrays); the canvas
+# is only a view of it. Each agent's box and label share a tag, so moving an
+# agent is one canvas.move call, and the canvas is only updated every
+# render_every simulation ticks, so Tk calls do not limit the simulation.
 
-        # Keep chasing CAT within canvas boundaries (simple bounce if hits edge)
-        if next_d_x1 < 0 or next_d_x2 > CANVAS_WIDTH:
-            move_x = -move_x # Just reverse if it hits the edge
-        if next_d_y1 < 0 or next_d_y2 > CANVAS_HEIGHT:
-            move_y = -move_y # Just reverse if it hits the edge
+def _create_window(config):
+    """Creates the chase window and its canvas."""
+    # --- Setup the main window ---
+    root = tk.Tk()
+    root.title("Mouse and CAT Chase") # Updated title
+    root.geometry("800x600") # Larger window for the chase scene
+    root.resizable(False, False) # Prevent resizing for simpler coordinate management
 
-        canvas.move(chasing_object_id, move_x, move_y)
-        canvas.move(chasing_object_text_id, move_x, move_y)
+    # --- Create the canvas ---
+    # Use fixed dimensions for canvas, which are then used for calculations
+    canvas = tk.Canvas(root, width=config.width, height=config.height, bg="#E0FFFF", bd=2, relief="groove") # Light cyan background for a techy feel
+    canvas.pack(pady=10)
+    return root, canvas
+
+def _create_agent(canvas, tag, x, y, width, height, color, outline, label):
+    """Draws an agent's box and label; both carry tag, so canvas.move(tag, ...) moves the agent."""
+    canvas.create_rectangle(x, y, x + width, y + height, fill=color, outline=outline, width=2, tags=(tag, tag + "_box"))
+    canvas.create_text(x + width / 2, y + height / 2, text=label, fill="white",
+                       font=("Arial", 10, "bold"), tags=(tag, tag + "_text"))
+
+def _show_game_over(canvas, config, text):
+    canvas.create_text(
+        config.width / 2, config.height / 2, # Use fixed dimensions for text centering
+        text=text, fill="red", font=("Arial", 24, "bold"), tags="game_over_text"
+    )
+
+def create_chase_animation(seed=None, config=DEFAULT_CONFIG, render_every=1):
+    """
+    Creates a Tkinter window with a canvas and animates a CAT chasing a Mouse.
+    The 'chased' Mouse moves randomly, and the 'chasing' CAT moves towards it.
+    The animation stops when the chasing CAT "catches" the chased Mouse.
+    The chase itself is computed by chase_step; the canvas is redrawn every
+    render_every ticks.
+    """
+    rng = random.Random(seed)
+    root, canvas = _create_window(config)
+
+    # --- Initial Positions ---
+    # Mouse starts in the middle-left part of the canvas, CAT in the middle-right part
+    state = initial_state(config, rng)
+    drawn = state # Positions the canvas currently shows
+
+    # --- Create Canvas Objects ---
+    # Chased Mouse (red) and chasing CAT (blue)
+    _create_agent(canvas, "chased_object", state.mouse_x, state.mouse_y, config.mouse_width, config.mouse_height,
+                  "red", "darkred", "Mouse")
+    _create_agent(canvas, "chasing_object", state.cat_x, state.cat_y, config.cat_width, config.cat_height,
+                  "blue", "darkblue", "CAT")
+
+    # --- Game State Variables ---
+    frame_delay = int(TICK_SECONDS * 1000 * render_every) # Milliseconds between frames (20 FPS when render_every is 1)
+
+    # --- Animation Function ---
+    def animate_chase():
+        nonlocal state, drawn
+
+        caught = False
+        for tick in range(render_every):
+            state, caught = chase_step(state, config, rng)
+            if caught:
+                break
+
+        # One move per agent, by the distance covered since the last frame
+        canvas.move("chased_object", state.mouse_x - drawn.mouse_x, state.mouse_y - drawn.mouse_y)
+        canvas.move("chasing_object", state.cat_x - drawn.cat_x, state.cat_y - drawn.cat_y)
+        drawn = state
 
         # --- Collision Detection (Chasing CAT catches Chased Mouse) ---
-        # AABB collision check
-        if (d_x1 < e_x2 and d_x2 > e_x1 and
-            d_y1 < e_y2 and d_y2 > e_y1):
-            game_over = True
-            canvas.create_text(
-                CANVAS_WIDTH / 2, CANVAS_HEIGHT / 2, # Use fixed dimensions for text centering
-                text="GAME OVER!\nCAT Caught Mouse!", # Updated game over message
-                fill="red", font=("Arial", 24, "bold"), tags="game_over_text"
-            )
+        if caught:
+            _show_game_over(canvas, config, "GAME OVER!\nCAT Caught Mouse!")
             return # Stop further animation steps
 
         # Schedule the next animation step
-        root.after(animation_delay, animate_chase)
+        root.after(frame_delay, animate_chase)
 
     # Start the animation loop
     animate_chase()
@@ -165,5 +501,95 @@ def create_chase_animation():
     # Run the Tkinter event loop
     root.mainloop()
 
+def create_swarm_animation(cats, mice, seed=None, config=DEFAULT_CONFIG, render_every=2, spatial_index=True):
+    """
+    Animates a Swarm of cats and mice. Caught mice are removed from the canvas;
+    the animation stops when no mouse is left.
+    """
+    swarm = Swarm(cats, mice, config, seed, spatial_index)
+    root, canvas = _create_window(config)
+
+    mouse_tags = [f"mouse{i}" for i in range(mice)]
+    cat_tags = [f"cat{i}" for i in range(cats)]
+    for tag, (x, y) in zip(mouse_tags, swarm.mouse_pos.tolist()):
+        _create_agent(canvas, tag, x, y, config.mouse_width, config.mouse_height, "red", "darkred", "Mouse")
+    for tag, (x, y) in zip(cat_tags, swarm.cat_pos.tolist()):
+        _create_agent(canvas, tag, x, y, config.cat_width, config.cat_height, "blue", "darkblue", "CAT")
+    status_id = canvas.create_text(10, 10, anchor="nw", font=("Arial", 12, "bold"))
+
+    # Positions and mice the canvas currently shows
+    drawn_mice = swarm.mouse_pos.copy()
+    drawn_cats = swarm.cat_pos.copy()
+    shown = swarm.mouse_alive.copy()
+    frame_delay = int(TICK_SECONDS * 1000 * render_every)
+
+    def move_agents(tags, positions, drawn):
+        """One canvas.move per agent that moved since the last frame."""
+        delta = positions - drawn
+        moved = np.flatnonzero(np.any(delta != 0, axis=1))
+        for i, (dx, dy) in zip(moved.tolist(), delta[moved].tolist()):
+            canvas.move(tags[i], dx, dy)
+        drawn[moved] = positions[moved]
+
+    def animate_swarm():
+        for tick in range(render_every):
+            if not swarm.mice_left():
+                break
+            swarm.step()
+
+        for i in np.flatnonzero(shown & ~swarm.mouse_alive).tolist():
+            canvas.delete(mouse_tags[i])
+        shown[:] = swarm.mouse_alive
+        move_agents(mouse_tags, swarm.mouse_pos, drawn_mice)
+        move_agents(cat_tags, swarm.cat_pos, drawn_cats)
+        canvas.itemconfigure(status_id, text=f"Tick {swarm.ticks}: {swarm.mice_left()} of {mice} mice left")
+
+        if not swarm.mice_left():
+            _show_game_over(canvas, config, "GAME OVER!\nCATs Caught Every Mouse!")
+            return
+        root.after(frame_delay, animate_swarm)
+
+    animate_swarm()
+    root.mainloop()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Mouse and CAT chase")
+    parser.add_argument("--seed", type=int, help="seed for the animated chase, or the first seed of a batch")
+    parser.add_argument("--batch", type=int, metavar="RUNS",
+                        help="run RUNS seeded chases per parameter combination in a process pool "
+                             "instead of animating, and report time-to-catch distributions")
+    parser.add_argument("--workers", type=int, help="processes for --batch (default: CPU count)")
+    parser.add_argument("--cat-speed", type=int, nargs="+", default=[DEFAULT_CONFIG.cat_speed])
+    parser.add_argument("--mouse-speed", type=int, nargs="+", default=[DEFAULT_CONFIG.mouse_speed])
+    parser.add_argument("--cat-size", type=int, nargs="+", default=[DEFAULT_CONFIG.cat_width])
+    parser.add_argument("--mouse-size", type=int, nargs="+", default=[DEFAULT_CONFIG.mouse_width])
+    parser.add_argument("--histogram", action="store_true", help="with --batch, also print a histogram per combination")
+    parser.add_argument("--swarm", type=int, nargs=2, metavar=("CATS", "MICE"),
+                        help="animate many cats and mice, simulated with NumPy")
+    parser.add_argument("--headless", action="store_true",
+                        help="with --swarm, run without a window and report tick times")
+    parser.add_argument("--no-spatial-index", dest="spatial_index", action="store_false",
+                        help="with --swarm, check every cat/mouse pair instead of using the grid index")
+    parser.add_argument("--ticks", type=int, default=1000, help="ticks to run with --swarm --headless (default: %(default)s)")
+    parser.add_argument("--render-every", type=int,
+                        help="redraw the canvas every N simulation ticks (default: 1, or 2 with --swarm)")
+    args = parser.parse_args()
+    if args.swarm and np is None:
+        parser.error("--swarm requires NumPy")
+    return args
+
 if __name__ == "__main__":
-    create_chase_animation()
\ No newline at end of file
+    args = parse_args()
+    # The animations and the swarm use the first of each speed and size given
+    config = DEFAULT_CONFIG._replace(cat_speed=args.cat_speed[0], mouse_speed=args.mouse_speed[0],
+                                     cat_width=args.cat_size[0], cat_height=args.cat_size[0],
+                                     mouse_width=args.mouse_size[0], mouse_height=args.mouse_size[0])
+    if args.swarm and args.headless:
+        bench_swarm(*args.swarm, args.ticks, args.seed, config, args.spatial_index)
+    elif args.swarm:
+        create_swarm_animation(*args.swarm, args.seed, config, args.render_every or 2, args.spatial_index)
+    elif args.batch:
+        run_study(args.batch, args.cat_speed, args.mouse_speed, args.cat_size, args.mouse_size,
+                  args.seed or 0, args.workers, args.histogram)
+    else:
+        create_chase_animation(args.seed, config, args.render_every or 1)
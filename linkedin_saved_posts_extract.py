@@ -1,14 +1,42 @@
+import argparse
+import collections
+import copy
+import csv
+import json
+import os
+import random
+import sqlite3
 import time
 import re
 import gspread
+import requests
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service as ChromeService
 from selenium.webdriver.chrome.options import Options as ChromeOptions
 from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import (NoSuchElementException, StaleElementReferenceException,
+                                        TimeoutException)
 from bs4 import BeautifulSoup
 
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None # The "selectolax" parser backend is unavailable
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None # The "lxml" parser backend is unavailable
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None # The "parquet" sink is unavailable
+
 # --- CONFIGURATION ---
 
 # LinkedIn Credentials
@@ -25,137 +53,791 @@ YOUR_PERSONAL_EMAIL = "xxx@gmail.com"
 # For example: "1a2b3c4d5e6f7g8h9i0j..."
 GDRIVE_FOLDER_ID = "your_folder_ID"
 
+SHEET_HEADER = "Post URL"
+SHEET_CHUNK_ROWS = 10_000 # Rows per batch update request (keeps request bodies around 1-2 MB)
+SHEETS_RETRIES = 6 # Retries of a Sheets API call that hit the rate limit (429) or a server error (5xx)
+SHEETS_BACKOFF = 1.0 # Seconds before the first retry; doubles after every retry...
+SHEETS_MAX_BACKOFF = 64.0 # ...up to this
+
+# Local record of the posts already synced, so later runs only fetch and upload new ones.
+# Sinks other than the Google Sheet keep their own record (linkedin_saved_posts.csv.sqlite3, ...).
+STATE_FILE = "linkedin_saved_posts.sqlite3"
+
+# Wait Configuration (seconds)
+PAGE_LOAD_TIMEOUT = 30 # Max wait for a page's main element to appear
+LOGIN_TIMEOUT = 60 # Max wait to be logged in (leaves time for a manual security check)
+NETWORK_IDLE_TIME = 0.5 # No new network requests for this long counts as idle
+SCROLL_TIMEOUT = 6 # Max wait for more posts to appear after a scroll
+SCROLL_RETRIES = 2 # Scrolls in a row without new posts before the list is considered complete
+POLL_INTERVAL = 0.05 # First poll interval; doubles after every miss...
+MAX_POLL_INTERVAL = 1.0 # ...up to this
+
+
+# --- WAITS ---
+
+def wait_for(driver, condition, timeout, message=""):
+    """
+    Polls condition(driver) until it returns something truthy and returns that value.
+    The poll interval starts at POLL_INTERVAL and backs off exponentially, so content
+    that is already there is picked up at once without hammering a slow page.
+    Raises TimeoutException if the condition does not hold within timeout seconds.
+    """
+    deadline = time.monotonic() + timeout
+    interval = POLL_INTERVAL
+    while True:
+        try:
+            value = condition(driver)
+            if value:
+                return value
+        except (NoSuchElementException, StaleElementReferenceException):
+            pass # The element is not there (yet) or was re-rendered; poll again
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutException(message)
+        time.sleep(min(interval, remaining))
+        interval = min(interval * 2, MAX_POLL_INTERVAL)
+
+
+# Counts finished resource requests (XHR/fetch included). The browser's timing buffer only
+# holds a few hundred entries, so it is drained into a running total before it fills up.
+NETWORK_ACTIVITY_SCRIPT = """
+var count = performance.getEntriesByType('resource').length;
+if (count >= 200) {
+    window.__resourcesSeen = (window.__resourcesSeen || 0) + count;
+    performance.clearResourceTimings();
+    count = 0;
+}
+return [document.readyState, (window.__resourcesSeen || 0) + count];
+"""
+
+
+class NetworkIdle:
+    """
+    Condition that holds once the document has loaded and no new network request
+    has finished for quiet_time seconds.
+    """
+    def __init__(self, quiet_time=NETWORK_IDLE_TIME):
+        self.quiet_time = quiet_time
+        self.last_count = None
+        self.last_change = None
+
+    def __call__(self, driver):
+        ready_state, count = driver.execute_script(NETWORK_ACTIVITY_SCRIPT)
+        now = time.monotonic()
+        if ready_state != "complete" or count != self.last_count:
+            self.last_count = count
+            self.last_change = now
+            return False
+        return now - self.last_change >= self.quiet_time
+
+
+PAGE_SIZE_SCRIPT = """
+return [document.body.scrollHeight,
+        document.querySelectorAll('.scaffold-finite-scroll__content a[href]').length];
+"""
+
+
+def page_size(driver):
+    """Returns the (scroll height, number of links in the post list) of the current page."""
+    return tuple(driver.execute_script(PAGE_SIZE_SCRIPT))
+
+
+def page_changed(previous_size):
+    """Condition that returns the new page size once it differs from previous_size."""
+    def condition(driver):
+        size = page_size(driver)
+        return size if size != previous_size else None
+    return condition
+
+
+def scroll_pages(driver):
+    """
+    Yields once for the page as loaded and again after every scroll that brought in more
+    content. Stops after SCROLL_RETRIES scrolls in a row load nothing new. Each scroll
+    only waits as long as it takes the next batch of posts to arrive.
+    """
+    yield
+    size = page_size(driver)
+    misses = 0
+    while misses < SCROLL_RETRIES:
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        try:
+            size = wait_for(driver, page_changed(size), SCROLL_TIMEOUT)
+            misses = 0
+            yield
+        except TimeoutException:
+            misses += 1
+
+
+def scroll_to_end(driver):
+    """Scrolls until no more posts load."""
+    for _ in scroll_pages(driver):
+        pass
+
+
+# --- PARSING ---
+
+# Links to posts (activities) or articles (pulse), relative or absolute on LinkedIn's own
+# host. Anything from the query string on (like ?utm_source=...) is left out of the match.
+POST_LINK_PATTERN = re.compile(
+    r"(?:https?://(?:www\.)?linkedin\.com)?(/feed/update/(urn:li:activity:\d+)[^?#]*|/pulse/[^?#]+)")
+
+
+def normalize_post_url(href):
+    """
+    Returns the canonical absolute URL if href links to a post or an article,
+    otherwise None.
+    """
+    match = POST_LINK_PATTERN.match(href)
+    return f"https://www.linkedin.com{match.group(1)}" if match else None
+
+
+def post_key(url):
+    """Returns the activity URN of a post URL, or the path of an article URL."""
+    match = POST_LINK_PATTERN.match(url)
+    return match.group(2) or match.group(1)
+
+
+POST_LIST_CLASS = "scaffold-finite-scroll__content"
+
+# Parser backends: each returns the hrefs of all links in the post list of a saved-posts
+# page, in page order, or None if the page has no post list.
+
+
+def hrefs_selectolax(html):
+    container = LexborHTMLParser(html).css_first(f"div.{POST_LIST_CLASS}")
+    if container is None:
+        return None
+    return [link.attributes["href"] or "" for link in container.css("a[href]")]
+
+
+def hrefs_lxml(html):
+    containers = lxml.html.fromstring(html).find_class(POST_LIST_CLASS)
+    containers = [element for element in containers if element.tag == "div"]
+    if not containers:
+        return None
+    return containers[0].xpath(".//a/@href")
+
+
+def hrefs_bs4(html):
+    content_container = BeautifulSoup(html, "html.parser").find("div", class_=POST_LIST_CLASS)
+    if content_container is None:
+        return None
+    return [link["href"] for link in content_container.find_all("a", href=True)]
+
+
+# Fastest first; the first installed one is the default
+PARSER_BACKENDS = {}
+if LexborHTMLParser is not None:
+    PARSER_BACKENDS["selectolax"] = hrefs_selectolax
+if lxml is not None:
+    PARSER_BACKENDS["lxml"] = hrefs_lxml
+PARSER_BACKENDS["bs4"] = hrefs_bs4
+DEFAULT_PARSER = next(iter(PARSER_BACKENDS))
+
+
+def extract_post_urls(html, parser=DEFAULT_PARSER):
+    """Parses a complete saved-posts page and returns its post URLs in page order."""
+    hrefs = PARSER_BACKENDS[parser](html)
+    if hrefs is None:
+        print("Could not find the main content container. The LinkedIn page structure may have changed.")
+        return []
+    if not hrefs:
+        print("Found content container, but it contains no links.")
+
+    found_urls = {} # Insertion-ordered set
+    match = POST_LINK_PATTERN.match
+    for href in hrefs:
+        link = match(href)
+        if link:
+            found_urls[f"https://www.linkedin.com{link.group(1)}"] = None
+    return list(found_urls)
+
+
+# --- STATE ---
+
+class UrlStore:
+    """
+    SQLite record of every saved post seen so far, keyed by activity URN or article
+    path, with the time it was first seen and whether it has reached the sheet yet.
+    Rows are kept oldest first. A URL is in the store (`url in store`) once it has been
+    seen, so the store can be passed as stop_at to end scraping at known posts.
+    """
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS posts (
+                post_key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                first_seen TEXT NOT NULL, -- UTC, ISO 8601
+                synced INTEGER NOT NULL DEFAULT 0
+            )""")
+        self.connection.commit()
+
+    def __contains__(self, url):
+        row = self.connection.execute("SELECT 1 FROM posts WHERE post_key = ?", (post_key(url),)).fetchone()
+        return row is not None
+
+    def __len__(self):
+        return self.connection.execute("SELECT count(*) FROM posts").fetchone()[0]
+
+    def synced_count(self):
+        return self.connection.execute("SELECT count(*) FROM posts WHERE synced").fetchone()[0]
+
+    def add(self, urls):
+        """
+        Records URLs scraped in page order (newest first) and returns how many were new.
+        They are inserted oldest first so that rowid order stays chronological.
+        """
+        first_seen = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        before = self.connection.total_changes
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO posts (post_key, url, first_seen) VALUES (?, ?, ?)",
+                ((post_key(url), url, first_seen) for url in reversed(urls)))
+        return self.connection.total_changes - before
+
+    def unsynced(self):
+        """Returns the URLs not uploaded to the sheet yet, oldest first."""
+        return [url for (url,) in self.connection.execute(
+            "SELECT url FROM posts WHERE NOT synced ORDER BY rowid")]
+
+    def mark_synced(self, urls):
+        with self.connection:
+            self.connection.executemany("UPDATE posts SET synced = 1 WHERE post_key = ?",
+                                        ((post_key(url),) for url in urls))
+
+    def close(self):
+        self.connection.close()
+
 
 # --- FUNCTIONS ---
 
-def scrape_linkedin_post_urls():
+# Returns the hrefs of links in the post list that earlier calls have not returned yet,
+# marking them as it goes, so each scroll only ships the newly loaded links to Python.
+NEW_LINKS_SCRIPT = """
+var links = document.querySelectorAll('.scaffold-finite-scroll__content a[href]:not([data-scraped])');
+var hrefs = [];
+for (var i = 0; i < links.length; i++) {
+    links[i].setAttribute('data-scraped', '');
+    hrefs.push(links[i].getAttribute('href'));
+}
+return hrefs;
+"""
+
+
+def stream_post_urls(driver, stop_at=()):
     """
-    Scrapes the URLs of saved posts from your LinkedIn account using Google Chrome.
+    Yields post URLs as they load while scrolling through the saved posts page. Saved
+    posts are listed newest first, so the stream ends at the first URL in stop_at.
     """
-    print("Logging in to LinkedIn using Google Chrome...")
-    chrome_options = ChromeOptions()
-    chrome_options.add_argument("--start-maximized")
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+    seen = set()
+    for _ in scroll_pages(driver):
+        for href in driver.execute_script(NEW_LINKS_SCRIPT):
+            clean_url = normalize_post_url(href)
+            # Re-rendered list items lose their mark and come back; skip repeats
+            if not clean_url or clean_url in seen:
+                continue
+            if clean_url in stop_at:
+                print(f"Reached already known URL: {clean_url}")
+                return
+            seen.add(clean_url)
+            yield clean_url
 
-    service = ChromeService(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=chrome_options)
-    
-    driver.get("https://www.linkedin.com/login")
-    time.sleep(3)
+
+def open_saved_posts(driver):
+    """Logs in and opens the saved posts page. Returns False if the login failed."""
+    login_url = "https://www.linkedin.com/login"
+    driver.get(login_url)
 
     try:
+        wait_for(driver, EC.presence_of_element_located((By.ID, "username")), PAGE_LOAD_TIMEOUT,
+                 "the login form did not appear")
         driver.find_element(By.ID, "username").send_keys(LINKEDIN_EMAIL)
         driver.find_element(By.ID, "password").send_keys(LINKEDIN_PASSWORD)
         driver.find_element(By.ID, "password").send_keys(Keys.RETURN)
         print("Login submitted. Waiting for page to load...")
-        time.sleep(10)
+        # Leaving the login page is not enough: a failed login or a security
+        # checkpoint (/checkpoint/...) redirects too. Wait until the feed or the
+        # global navigation bar of a logged-in session shows up.
+        wait_for(driver, EC.any_of(EC.url_contains("linkedin.com/feed"),
+                                   EC.presence_of_element_located((By.ID, "global-nav"))),
+                 LOGIN_TIMEOUT, "not logged in (wrong credentials, or a security check was not completed)")
     except Exception as e:
         print(f"Error during login: {e}")
-        driver.quit()
-        return []
+        return False
 
     print("Navigating to saved posts...")
     driver.get("https://www.linkedin.com/my-items/saved-posts/")
-    time.sleep(10)
+    try:
+        wait_for(driver, EC.presence_of_element_located((By.CSS_SELECTOR, ".scaffold-finite-scroll__content")),
+                 PAGE_LOAD_TIMEOUT)
+        wait_for(driver, NetworkIdle(), PAGE_LOAD_TIMEOUT)
+    except TimeoutException:
+        print("The saved posts list did not finish loading; extracting whatever is there.")
+    return True
 
-    print("Scrolling to load all posts...")
-    last_height = driver.execute_script("return document.body.scrollHeight")
-    scroll_attempts = 0
-    while scroll_attempts < 5:
-        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(4)
-        new_height = driver.execute_script("return document.body.scrollHeight")
-        if new_height == last_height:
-            scroll_attempts += 1
+
+def iter_linkedin_post_urls(stop_at=(), full_parse=False, parser=DEFAULT_PARSER):
+    """
+    Yields the URLs of saved posts from your LinkedIn account using Google Chrome.
+
+    By default URLs are extracted while scrolling and the stream stops at the first URL
+    in stop_at. With full_parse the whole list is loaded first and the final page is
+    parsed in one go with the given parser backend. The browser is closed when the generator finishes or is closed.
+    """
+    print("Logging in to LinkedIn using Google Chrome...")
+    chrome_options = ChromeOptions()
+    chrome_options.add_argument("--start-maximized")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+
+    service = ChromeService(ChromeDriverManager().install())
+    driver = webdriver.Chrome(service=service, options=chrome_options)
+    try:
+        if not open_saved_posts(driver):
+            return
+        if full_parse:
+            print("Scrolling to load all posts...")
+            scroll_to_end(driver)
+            print("Extracting post URLs...")
+            yield from extract_post_urls(driver.page_source, parser)
         else:
-            scroll_attempts = 0
-        last_height = new_height
+            print("Scrolling and extracting post URLs...")
+            yield from stream_post_urls(driver, stop_at)
+    finally:
+        driver.quit()
 
-    # --- FIX STARTS HERE ---
-    print("Extracting post URLs...")
-    soup = BeautifulSoup(driver.page_source, "html.parser")
-    found_urls = set()
 
-    # New strategy: Find the main content container for the feed/list.
-    # This class is often used for the scrollable content area.
-    content_container = soup.find("div", class_=re.compile(r"scaffold-finite-scroll__content"))
+def scrape_linkedin_post_urls(stop_at=(), full_parse=False, parser=DEFAULT_PARSER):
+    """
+    Scrapes the URLs of saved posts from your LinkedIn account using Google Chrome.
+    """
+    urls = []
+    for url in iter_linkedin_post_urls(stop_at, full_parse, parser):
+        print(f"Found URL: {url}")
+        urls.append(url)
+    return urls
 
-    if not content_container:
-        print("Could not find the main content container. The LinkedIn page structure may have changed.")
-        link_elements = []
-    else:
-        # Find all links within that container.
-        link_elements = content_container.find_all("a", href=True)
+# --- SINKS ---
+# A sink stores the synced URLs under a "Post URL" header. write(urls, replace, on_written)
+# appends the URLs, or replaces everything stored before when replace is set, and calls
+# on_written(urls) with each part of the URLs as soon as that part is stored.
 
-    if not link_elements:
-         print("Found content container, but it contains no links.")
+def with_retries(call, *args, **kwargs):
+    """
+    Calls call(*args, **kwargs), retrying rate-limit (429) and server (5xx) errors and
+    dropped connections with exponential backoff and jitter.
+    """
+    delay = SHEETS_BACKOFF
+    for attempt in range(SHEETS_RETRIES + 1):
+        try:
+            return call(*args, **kwargs)
+        except (gspread.exceptions.APIError, requests.exceptions.ConnectionError) as e:
+            status = e.response.status_code if isinstance(e, gspread.exceptions.APIError) else None
+            if attempt == SHEETS_RETRIES or (status is not None and status != 429 and status < 500):
+                raise
+            wait = delay * random.uniform(0.5, 1.0)
+            print(f"Sheets API call failed ({status or type(e).__name__}), retrying in {wait:.1f}s...")
+            time.sleep(wait)
+            delay = min(delay * 2, SHEETS_MAX_BACKOFF)
 
-    for link_element in link_elements:
+
+def _string_rows(values):
+    return [{"values": [{"userEnteredValue": {"stringValue": value}}]} for value in values]
+
+
+class GoogleSheetSink:
+    """
+    Writes the URLs to a worksheet with as few API calls as possible: opening the
+    spreadsheet, one metadata read, then one batch update per SHEET_CHUNK_ROWS rows
+    that creates the worksheet if needed, resizes it to fit and writes the cells.
+    The worksheet is kept sized to its data, so appends write at its last row and a
+    retried batch rewrites the same cells instead of adding duplicate rows. Each
+    chunk is reported to on_written once its batch succeeded, so a run that fails
+    half-way only leaves the unwritten chunks to the next run.
+    """
+    def __init__(self, client, title=GSHEET_NAME, worksheet_title=GSHEET_WORKSHEET_NAME,
+                 folder_id=GDRIVE_FOLDER_ID, share_with=YOUR_PERSONAL_EMAIL):
+        self.client = client
+        self.title = title
+        self.worksheet_title = worksheet_title
+        self.folder_id = folder_id
+        self.share_with = share_with
+
+    def _open(self):
         try:
-            href = link_element['href']
-            
-            # We only want links to actual posts (activities) or articles (pulse).
-            # This is a more targeted filter.
-            if "/feed/update/urn:li:activity:" in href or "/pulse/" in href:
-                # Check if the URL is relative or absolute to build the correct full URL.
-                if href.startswith('/'):
-                    full_url = f"https://www.linkedin.com{href}"
-                else:
-                    full_url = href
-
-                # Clean the URL by removing query parameters (like ?utm_source=...).
-                clean_url = full_url.split("?")[0]
-                
-                if clean_url not in found_urls:
-                    print(f"Found URL: {clean_url}")
-                    found_urls.add(clean_url)
-        except Exception as e:
-            print(f"Could not parse a link element: {e}")
-            continue
-    # --- FIX ENDS HERE ---
-
-    driver.quit()
-    return list(found_urls)
+            return with_retries(self.client.open, self.title, folder_id=self.folder_id)
+        except gspread.exceptions.SpreadsheetNotFound:
+            print(f"Spreadsheet '{self.title}' not found, creating a new one in your specified folder.")
+            # Create the new sheet inside the folder you specified.
+            sh = with_retries(self.client.create, self.title, folder_id=self.folder_id)
+            print(f"Sharing sheet with {self.share_with}")
+            with_retries(sh.share, self.share_with, perm_type='user', role='writer')
+            return sh
+
+    def _read_sheets(self, sh):
+        """Returns the properties of all worksheets, and those of ours (or None)."""
+        metadata = with_retries(sh.fetch_sheet_metadata, params={"fields": "sheets.properties"})
+        sheets = [sheet["properties"] for sheet in metadata.get("sheets", [])]
+        return sheets, next((sheet for sheet in sheets if sheet["title"] == self.worksheet_title), None)
+
+    def _batch_update(self, sh, batch):
+        """
+        Sends one batch update with retries. A batch that adds the worksheet may have
+        been applied even though its response was lost, and sending it again would
+        fail with "already exists": so before a retry the metadata is read again, and
+        if the worksheet is there the addSheet is dropped. The rest of the batch
+        resizes to and writes the same cells again, so repeating it is harmless.
+        """
+        attempts = 0
+
+        def attempt():
+            nonlocal attempts
+            attempts += 1
+            if attempts > 1 and "addSheet" in batch[0] and self._read_sheets(sh)[1] is not None:
+                del batch[0]
+            return sh.batch_update({"requests": batch})
+
+        return with_retries(attempt)
+
+    def write(self, urls, replace=False, on_written=None):
+        if not urls and not replace:
+            return
+        sh = self._open()
+        sheets, properties = self._read_sheets(sh)
+
+        batch = []
+        if properties is None:
+            print(f"Worksheet '{self.worksheet_title}' not found, creating a new one.")
+            sheet_id = max((sheet["sheetId"] for sheet in sheets), default=-1) + 1
+            batch.append({"addSheet": {"properties": {
+                "sheetId": sheet_id, "title": self.worksheet_title,
+                "gridProperties": {"rowCount": 1, "columnCount": 1}}}})
+            replace = True # Starts with the header
+        else:
+            sheet_id = properties["sheetId"]
+        urls = list(urls)
+        if replace:
+            rows = [SHEET_HEADER] + urls
+            start = 0
+            # Shrinking the grid to the new data drops whatever was stored before
+            resize_fields = "gridProperties.rowCount,gridProperties.columnCount"
+        else:
+            rows = urls
+            start = properties["gridProperties"]["rowCount"]
+            resize_fields = "gridProperties.rowCount"
+        first_url = len(rows) - len(urls) # Row of the first URL (after the header, if any)
+
+        print(f"Adding {len(urls)} new URLs to the sheet...")
+        for offset in range(0, len(rows), SHEET_CHUNK_ROWS):
+            chunk = rows[offset:offset + SHEET_CHUNK_ROWS]
+            batch.append({"updateSheetProperties": {
+                "properties": {"sheetId": sheet_id, "gridProperties": {
+                    "rowCount": start + offset + len(chunk), "columnCount": 1}},
+                "fields": resize_fields}})
+            batch.append({"updateCells": {
+                "start": {"sheetId": sheet_id, "rowIndex": start + offset, "columnIndex": 0},
+                "rows": _string_rows(chunk),
+                "fields": "userEnteredValue"}})
+            self._batch_update(sh, batch)
+            batch = []
+            resize_fields = "gridProperties.rowCount" # Later chunks only grow the grid
+            if on_written:
+                on_written(urls[max(0, offset - first_url):offset + len(chunk) - first_url])
+
+
+class CsvSink:
+    """Writes the URLs to a CSV file."""
+    def __init__(self, path):
+        self.path = path
+
+    def write(self, urls, replace=False, on_written=None):
+        new_file = replace or not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        with open(self.path, "w" if replace else "a", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            if new_file:
+                writer.writerow([SHEET_HEADER])
+            writer.writerows([url] for url in urls)
+        if on_written:
+            on_written(urls)
+
+
+class SqliteSink:
+    """Writes the URLs to a table in an SQLite database."""
+    def __init__(self, path):
+        self.path = path
 
-def save_to_google_sheets(urls):
+    def write(self, urls, replace=False, on_written=None):
+        connection = sqlite3.connect(self.path)
+        try:
+            with connection:
+                connection.execute(f'CREATE TABLE IF NOT EXISTS saved_posts ("{SHEET_HEADER}" TEXT NOT NULL)')
+                if replace:
+                    connection.execute("DELETE FROM saved_posts")
+                connection.executemany("INSERT INTO saved_posts VALUES (?)", ([url] for url in urls))
+        finally:
+            connection.close()
+        if on_written:
+            on_written(urls)
+
+
+class ParquetSink:
     """
-    Saves the extracted URLs to a Google Sheet inside a specific Drive folder.
+    Writes the URLs to a Parquet file. Parquet files cannot be appended to, so the
+    file is rewritten with the old and the new rows.
     """
-    print("Authenticating with Google Sheets...")
-    gc = gspread.service_account(filename=GCREDS_FILE)
+    def __init__(self, path):
+        self.path = path
 
-    try:
-        sh = gc.open(GSHEET_NAME, folder_id=GDRIVE_FOLDER_ID)
-    except gspread.exceptions.SpreadsheetNotFound:
-        print(f"Spreadsheet '{GSHEET_NAME}' not found, creating a new one in your specified folder.")
-        # Create the new sheet inside the folder you specified.
-        sh = gc.create(GSHEET_NAME, folder_id=GDRIVE_FOLDER_ID)
-        print(f"Sharing sheet with {YOUR_PERSONAL_EMAIL}")
-        sh.share(YOUR_PERSONAL_EMAIL, perm_type='user', role='writer')
+    def write(self, urls, replace=False, on_written=None):
+        old_urls = []
+        if not replace and os.path.exists(self.path):
+            old_urls = pyarrow.parquet.read_table(self.path).column(SHEET_HEADER).to_pylist()
+        table = pyarrow.table({SHEET_HEADER: pyarrow.array(old_urls + list(urls), pyarrow.string())})
+        pyarrow.parquet.write_table(table, self.path)
+        if on_written:
+            on_written(urls)
+
+
+# --- OFFLINE SHEETS FAKE ---
+
+def fake_api_error(status, message="injected failure"):
+    """Builds the gspread APIError the real client raises for an HTTP error status."""
+    response = requests.Response()
+    response.status_code = status
+    response._content = json.dumps({"error": {"code": status, "message": message, "status": ""}}).encode()
+    return gspread.exceptions.APIError(response)
+
+
+class FakeSheetsClient:
+    """
+    In-memory stand-in for the parts of a gspread client that GoogleSheetSink uses, so
+    the writer can be run offline. Every call is counted in `calls`; the HTTP statuses
+    in `failures` are raised as API errors, one per call, before calls start succeeding.
+    Those in `lost_responses` are raised by batch updates after the update was applied,
+    like a response lost on the way back.
+    """
+    def __init__(self, failures=(), lost_responses=()):
+        self.spreadsheets = {}
+        self.failures = list(failures)
+        self.lost_responses = list(lost_responses)
+        self.calls = collections.Counter()
+
+    def call(self, name):
+        self.calls[name] += 1
+        if self.failures:
+            raise fake_api_error(self.failures.pop(0))
+
+    def respond(self):
+        if self.lost_responses:
+            raise fake_api_error(self.lost_responses.pop(0))
+
+    def open(self, title, folder_id=None):
+        self.call("open")
+        if title not in self.spreadsheets:
+            raise gspread.exceptions.SpreadsheetNotFound(title)
+        return self.spreadsheets[title]
+
+    def create(self, title, folder_id=None):
+        self.call("create")
+        self.spreadsheets[title] = FakeSpreadsheet(self)
+        return self.spreadsheets[title]
+
+
+class FakeSpreadsheet:
+    """A spreadsheet held by FakeSheetsClient: worksheet properties and their cells."""
+    def __init__(self, client):
+        self.client = client
+        self.sheets = {0: {"sheetId": 0, "title": "Sheet1",
+                           "gridProperties": {"rowCount": 1000, "columnCount": 26}}}
+        self.cells = {0: {}} # sheet id -> {(row, column): value}
+
+    def share(self, email_address, perm_type, role):
+        self.client.call("share")
+
+    def fetch_sheet_metadata(self, params=None):
+        self.client.call("fetch_sheet_metadata")
+        return {"sheets": [{"properties": copy.deepcopy(sheet)} for sheet in self.sheets.values()]}
+
+    def batch_update(self, body):
+        self.client.call("batch_update")
+        # Like the real API, either every request in the batch applies or none does
+        sheets = copy.deepcopy(self.sheets)
+        cells = {sheet_id: dict(values) for sheet_id, values in self.cells.items()}
+        for request in body["requests"]:
+            (kind, request), = request.items()
+            if kind == "addSheet":
+                properties = request["properties"]
+                if properties["sheetId"] in sheets or properties["title"] in (s["title"] for s in sheets.values()):
+                    raise fake_api_error(400, "sheet already exists")
+                sheets[properties["sheetId"]] = properties
+                cells[properties["sheetId"]] = {}
+            elif kind == "updateSheetProperties":
+                properties = request["properties"]
+                grid = sheets[properties["sheetId"]]["gridProperties"]
+                for field in request["fields"].split(","):
+                    name = field.split(".")[-1]
+                    grid[name] = properties["gridProperties"][name]
+                cells[properties["sheetId"]] = {
+                    (row, column): value for (row, column), value in cells[properties["sheetId"]].items()
+                    if row < grid["rowCount"] and column < grid["columnCount"]}
+            elif kind == "updateCells":
+                start = request["start"]
+                grid = sheets[start["sheetId"]]["gridProperties"]
+                if start["rowIndex"] + len(request["rows"]) > grid["rowCount"]:
+                    raise fake_api_error(400, "range exceeds grid limits")
+                for offset, row in enumerate(request["rows"]):
+                    for column, cell in enumerate(row["values"]):
+                        cells[start["sheetId"]][start["rowIndex"] + offset, start["columnIndex"] + column] = \
+                            cell["userEnteredValue"]["stringValue"]
+            else:
+                raise fake_api_error(400, f"unsupported request {kind}")
+        self.sheets, self.cells = sheets, cells
+        self.client.respond()
+
+    def column(self, title):
+        """Returns the first column of a worksheet, one value (or None) per grid row."""
+        sheet = next(sheet for sheet in self.sheets.values() if sheet["title"] == title)
+        values = self.cells[sheet["sheetId"]]
+        return [values.get((row, 0)) for row in range(sheet["gridProperties"]["rowCount"])]
+
+
+# --- PARSER BENCHMARK ---
+
+def synthetic_saved_posts_page(link_count, seed=0):
+    """
+    Builds a saved-posts page shaped like LinkedIn's with link_count links in the post
+    list: per saved post a tracked post or article link, an author profile link and a
+    hashtag link. Navigation links outside the list must be ignored by the parsers.
+    """
+    rng = random.Random(seed)
+    navigation = "".join(f'<li><a href="/feed/update/urn:li:activity:{n}/">Nav {n}</a></li>' for n in range(20))
+    items = []
+    for post in range((link_count + 2) // 3):
+        if rng.random() < 0.8:
+            target = f"/feed/update/urn:li:activity:{rng.randrange(10**18, 10**19)}/"
+        else:
+            target = f"https://www.linkedin.com/pulse/article-{post}-{rng.randrange(10**6)}/"
+        links = [
+            f'<a class="app-aware-link" href="{target}?utm_source=share&amp;trk={post}">'
+            f'<span aria-hidden="true">Post {post}</span></a>',
+            f'<a class="app-aware-link" href="https://www.linkedin.com/in/member-{post}?miniProfileUrn=x">Author</a>',
+            f'<a href="/feed/hashtag/?keywords=tag{post % 50}">#tag{post % 50}</a>',
+        ][:link_count - 3 * post]
+        items.append(f'<li class="reusable-search__result-container"><div class="entity-result">'
+                     f'{"".join(links[:2])}<p class="entity-result__summary">Saved post text '
+                     f'{"lorem ipsum " * 8}{"".join(links[2:])}</p></div></li>')
+    return (f'<html><head><title>Saved Posts</title></head><body><nav><ul>{navigation}</ul></nav>'
+            f'<main><div class="artdeco-card"><div class="pv0 {POST_LIST_CLASS}"><ul>{"".join(items)}</ul>'
+            f'</div></div></main></body></html>')
+
+
+def bench_parsers(html, repeats=5):
+    """
+    Times URL extraction from html with every installed parser backend (best of
+    repeats) and checks that they all find the same URLs.
+    """
+    print(f"Page: {len(html) / 2**20:.2f} MiB; best of {repeats} runs")
+    print(f"{'parser':<12}{'links':>8}{'posts':>8}{'ms':>10}{'links/s':>12}{'MiB/s':>8}")
+    reference = None
+    for name, backend in PARSER_BACKENDS.items():
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            urls = extract_post_urls(html, name)
+            best = min(best, time.perf_counter() - start)
+        links = len(backend(html) or ())
+        print(f"{name:<12}{links:>8}{len(urls):>8}{best * 1000:>10.1f}{links / best:>12.0f}"
+              f"{len(html) / 2**20 / best:>8.1f}")
+        if reference is None:
+            reference = (name, urls)
+        elif urls != reference[1]:
+            print(f"  warning: {name} found different URLs than {reference[0]}")
 
-    try:
-        worksheet = sh.worksheet(GSHEET_WORKSHEET_NAME)
-        worksheet.clear()
-        print("Cleared existing data from worksheet.")
-    except gspread.exceptions.WorksheetNotFound:
-        print(f"Worksheet '{GSHEET_WORKSHEET_NAME}' not found, creating a new one.")
-        worksheet = sh.add_worksheet(title=GSHEET_WORKSHEET_NAME, rows="1000", cols="1")
-    
-    worksheet.append_row(["Post URL"])
-    print(f"Adding {len(urls)} new URLs to the sheet...")
-    rows_to_add = [[url] for url in urls]
-
-    if rows_to_add:
-        worksheet.append_rows(rows_to_add)
 
 # --- MAIN ---
 
+SINK_OUTPUTS = {"csv": "saved_posts.csv", "sqlite": "saved_posts.sqlite3", "parquet": "saved_posts.parquet"}
+
+
+def make_sink(name, output=None):
+    """Creates the sink the URLs are saved to."""
+    if name == "sheets":
+        print("Authenticating with Google Sheets...")
+        return GoogleSheetSink(gspread.service_account(filename=GCREDS_FILE))
+    if name == "fake":
+        return GoogleSheetSink(FakeSheetsClient())
+    path = output or SINK_OUTPUTS[name]
+    return {"csv": CsvSink, "sqlite": SqliteSink, "parquet": ParquetSink}[name](path)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Copies the URLs of your saved LinkedIn posts to a Google Sheet")
+    parser.add_argument("--full-parse", action="store_true",
+                        help="load the whole list first and parse the final page once, "
+                             "instead of extracting URLs while scrolling")
+    parser.add_argument("--state",
+                        help="SQLite file recording the posts already synced (default: %s for the "
+                             "sheets sink, one per sink for the others, in memory for fake)" % STATE_FILE)
+    parser.add_argument("--full-sync", action="store_true",
+                        help="scroll through the whole list instead of stopping at the first known post "
+                             "(still only uploads posts that are not in the sheet yet)")
+    parser.add_argument("--sink", choices=["sheets", "csv", "sqlite", "parquet", "fake"], default="sheets",
+                        help="where to save the URLs: the Google Sheet, a local file, or an in-memory "
+                             "fake of the Sheets API for offline runs (default: %(default)s)")
+    parser.add_argument("--output", metavar="PATH",
+                        help="file written by the csv, sqlite and parquet sinks (default: %s)" %
+                             ", ".join(f"{path} for {name}" for name, path in SINK_OUTPUTS.items()))
+    parser.add_argument("--parser", choices=list(PARSER_BACKENDS), default=DEFAULT_PARSER,
+                        help="HTML parser used with --full-parse (default: fastest installed, %(default)s)")
+    parser.add_argument("--bench-parse", type=int, metavar="LINKS",
+                        help="benchmark the parser backends on a generated page with LINKS links and exit")
+    parser.add_argument("--bench-html", metavar="PATH",
+                        help="benchmark the parser backends on a saved page and exit")
+    args = parser.parse_args()
+    if args.sink == "parquet" and pyarrow is None:
+        parser.error("--sink parquet requires pyarrow")
+    if args.state is None:
+        if args.sink == "sheets":
+            args.state = STATE_FILE
+        elif args.sink == "fake":
+            args.state = ":memory:" # Nothing is really saved, so nothing may count as synced
+        else:
+            args.state = STATE_FILE.replace(".sqlite3", f".{args.sink}.sqlite3")
+    return args
+
+
 if __name__ == "__main__":
-    urls = scrape_linkedin_post_urls()
-    if urls:
-        print(f"Found {len(urls)} post URLs. Saving to Google Sheets...")
-        save_to_google_sheets(urls)
-        print(f"Successfully extracted and saved {len(urls)} URLs to your Google Sheet!")
-    else:
-        print("No posts were found or extracted. Please check your LinkedIn 'Saved Posts' page.")
+    args = parse_args()
+    if args.bench_parse or args.bench_html:
+        if args.bench_html:
+            with open(args.bench_html, encoding="utf-8") as file:
+                html = file.read()
+        else:
+            html = synthetic_saved_posts_page(args.bench_parse)
+        bench_parsers(html)
+        raise SystemExit
+    sink = make_sink(args.sink, args.output)
+    store = UrlStore(args.state)
+    try:
+        first_sync = store.synced_count() == 0
+        stop_at = () if args.full_sync else store
+        urls = scrape_linkedin_post_urls(stop_at, args.full_parse, args.parser)
+        new_count = store.add(urls)
+        # Includes URLs a previous run recorded but failed to upload
+        pending = store.unsynced()
+        if pending:
+            print(f"Found {new_count} new post URLs. Saving {len(pending)} to the {args.sink} sink...")
+            # Chunks are marked synced as they are stored: if a later one fails, the next
+            # run appends only the rest instead of writing the stored ones again
+            sink.write(pending, replace=first_sync, on_written=store.mark_synced)
+            print(f"Successfully saved {len(pending)} URLs!")
+            if args.sink == "fake":
+                print(f"Sheets API calls: {dict(sink.client.calls)}")
+        elif len(store):
+            print("No new saved posts since the last run.")
+        else:
+            print("No posts were found or extracted. Please check your LinkedIn 'Saved Posts' page.")
+    finally:
+        store.close()
@@ -1,8 +1,16 @@
 import pygame
 import random
+import argparse
+import collections
+import gc
+import time
+import struct
+import functools
 
-# --- Initialization ---
-pygame.init()
+try:
+    import numpy as np
+except ImportError:
+    np = None # The "numpy" entity backend is unavailable
 
 # --- Game Constants ---
 SCREEN_WIDTH = 800
@@ -13,6 +21,13 @@ ENEMY_WIDTH = 50
 ENEMY_HEIGHT = 50
 BULLET_WIDTH = 5
 BULLET_HEIGHT = 15
+BULLET_SPEED_Y = -10
+PLAYER_SPEED_X = 8
+FPS = 60 # Simulation steps per second; step() always advances exactly 1/FPS s
+ENEMY_COUNT = 8 # Enemies on screen at once
+BULLET_POOL_SIZE = 64 # Bullets that can be in flight at once
+GRID_CELL_SIZE = 64 # Spatial hash cell size; must be at least the largest sprite dimension
+MAX_DIRTY_RECTS = 100 # Beyond this many changed areas a full display flip is cheaper
 
 # --- Colors ---
 WHITE = (255, 255, 255)
@@ -21,10 +36,6 @@ RED = (255, 0, 0)
 GREEN = (0, 255, 0)
 BLUE = (0, 0, 255)
 
-# --- Game Window Setup ---
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("Space Shooter")
-
 # --- Game Assets (using simple rectangles) ---
 # You could replace these with images using pygame.image.load()
 player_img = pygame.Surface((PLAYER_WIDTH, PLAYER_HEIGHT))
@@ -36,11 +47,12 @@ enemy_img.fill(RED)
 bullet_img = pygame.Surface((BULLET_WIDTH, BULLET_HEIGHT))
 bullet_img.fill(BLUE)
 
-# --- Game Clock ---
-clock = pygame.time.Clock()
+background = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+background.fill(BLACK)
 
-# --- Font for Score ---
-font = pygame.font.Font(None, 36)
+# One frame of player input: direction keys held and SPACE presses this frame
+FrameInput = collections.namedtuple('FrameInput', ['left', 'right', 'shots'])
+NO_INPUT = FrameInput(False, False, 0)
 
 class Player(pygame.sprite.Sprite):
     """Represents the player's spaceship."""
@@ -48,19 +60,24 @@ class Player(pygame.sprite.Sprite):
         super().__init__()
         self.image = player_img
         self.rect = self.image.get_rect()
+        self.reset()
+
+    def reset(self):
+        """Puts the player back at the starting position."""
         self.rect.centerx = SCREEN_WIDTH // 2
         self.rect.bottom = SCREEN_HEIGHT - 10
         self.speed_x = 0
 
+    def steer(self, frame_input):
+        """Sets the speed for this frame from the direction keys held."""
+        self.speed_x = 0
+        if frame_input.left:
+            self.speed_x = -PLAYER_SPEED_X
+        if frame_input.right:
+            self.speed_x = PLAYER_SPEED_X
+
     def update(self):
         """Update player position based on key presses."""
-        self.speed_x = 0
-        keystate = pygame.key.get_pressed()
-        if keystate[pygame.K_LEFT]:
-            self.speed_x = -8
-        if keystate[pygame.K_RIGHT]:
-            self.speed_x = 8
-        
         self.rect.x += self.speed_x
         
         # Keep player on the screen
@@ -69,137 +86,591 @@ class Player(pygame.sprite.Sprite):
         if self.rect.left < 0:
             self.rect.left = 0
 
-    def shoot(self):
-        """Creates a new bullet and adds it to the sprite groups."""
-        bullet = Bullet(self.rect.centerx, self.rect.top)
-        all_sprites.add(bullet)
-        bullets.add(bullet)
+class SpritePool:
+    """
+    Fixed-capacity pool of preallocated sprites. acquire() hands out a free
+    sprite (or None when all are in use) and release() takes it back, so no
+    sprites are created or garbage-collected while the game runs.
+    """
+    def __init__(self, sprite_class, capacity):
+        self.free = [sprite_class(self) for _ in range(capacity)]
 
-class Enemy(pygame.sprite.Sprite):
-    """Represents an enemy ship."""
-    def __init__(self):
+    def acquire(self, *groups):
+        """Takes a free sprite and adds it to groups."""
+        if not self.free:
+            return None
+        sprite = self.free.pop()
+        sprite.add(*groups)
+        return sprite
+
+    def release(self, sprite):
+        """Removes sprite from all groups and returns it to the pool."""
+        if sprite.alive():
+            sprite.kill()
+            self.free.append(sprite)
+
+class PooledSprite(pygame.sprite.Sprite):
+    """A sprite owned by a SpritePool; deactivate() hands it back to the pool."""
+    def __init__(self, pool):
         super().__init__()
+        self.pool = pool
+
+    def deactivate(self):
+        self.pool.release(self)
+
+class Enemy(PooledSprite):
+    """Represents an enemy ship; spawn positions come from the game's seeded rng."""
+    def __init__(self, pool, rng):
+        super().__init__(pool)
+        self.rng = rng
         self.image = enemy_img
         self.rect = self.image.get_rect()
-        self.rect.x = random.randrange(SCREEN_WIDTH - self.rect.width)
-        self.rect.y = random.randrange(-100, -40)
-        self.speed_y = random.randrange(1, 4)
+        self.speed_y = 0
+
+    def activate(self):
+        """Places the enemy at a random spot above the screen."""
+        self.rect.x = self.rng.randrange(SCREEN_WIDTH - self.rect.width)
+        self.rect.y = self.rng.randrange(-100, -40)
+        self.speed_y = self.rng.randrange(1, 4)
 
     def update(self):
         """Move the enemy downwards."""
         self.rect.y += self.speed_y
         # Respawn if it moves off the bottom of the screen
         if self.rect.top > SCREEN_HEIGHT + 10:
-            self.rect.x = random.randrange(SCREEN_WIDTH - self.rect.width)
-            self.rect.y = random.randrange(-100, -40)
-            self.speed_y = random.randrange(1, 4)
+            self.activate()
 
-class Bullet(pygame.sprite.Sprite):
+class Bullet(PooledSprite):
     """Represents a bullet fired by the player."""
-    def __init__(self, x, y):
-        super().__init__()
+    def __init__(self, pool):
+        super().__init__(pool)
         self.image = bullet_img
         self.rect = self.image.get_rect()
+        self.speed_y = BULLET_SPEED_Y
+
+    def activate(self, x, y):
+        """Places the bullet with its bottom centre at (x, y)."""
         self.rect.bottom = y
         self.rect.centerx = x
-        self.speed_y = -10
 
     def update(self):
         """Move the bullet upwards."""
         self.rect.y += self.speed_y
-        # Kill the bullet if it moves off the top of the screen
+        # Return the bullet to the pool once it moves off the top of the screen
         if self.rect.bottom < 0:
-            self.kill()
+            self.deactivate()
+
+class SpatialHash:
+    """
+    Uniform grid broadphase for collisions. Each sprite is filed under the cell
+    holding its top-left corner; since no sprite is larger than a cell, a query
+    only has to look at the cells its rect covers plus one column to the left
+    and one row above.
+    """
+    def __init__(self, cell_size=GRID_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = collections.defaultdict(list)
 
-def show_go_screen():
-    """Displays the game over screen."""
+    def rebuild(self, sprites):
+        """Re-files every sprite; called once per frame after the sprites have moved."""
+        self.cells.clear()
+        cells = self.cells
+        size = self.cell_size
+        for sprite in sprites:
+            rect = sprite.rect
+            cells[rect.x // size, rect.y // size].append(sprite)
+
+    def query(self, rect):
+        """Returns the filed sprites whose rects overlap rect."""
+        size = self.cell_size
+        cells = self.cells
+        hits = []
+        for cx in range(rect.left // size - 1, (rect.right - 1) // size + 1):
+            for cy in range(rect.top // size - 1, (rect.bottom - 1) // size + 1):
+                bucket = cells.get((cx, cy))
+                if bucket:
+                    hits.extend(sprite for sprite in bucket if rect.colliderect(sprite.rect))
+        return hits
+
+def collide_bullets(enemy_grid, bullets):
+    """
+    Like groupcollide(enemies, bullets, True, True), but only tests each bullet
+    against the enemies near it. Each bullet hits at most one enemy; returns a
+    dict of the enemies hit -> the bullets that hit them.
+    """
+    hits = {}
+    for bullet in bullets.sprites():
+        targets = enemy_grid.query(bullet.rect)
+        if targets:
+            bullet.deactivate()
+            hits.setdefault(targets[0], []).append(bullet)
+    for enemy in hits:
+        enemy.deactivate()
+    return hits
+
+class ArrayWorld:
+    """
+    NumPy entity backend. Enemy and bullet positions, speeds and alive flags
+    are kept in arrays (structure of arrays) and moved, culled, respawned and
+    collided as batch operations each frame. There are no per-entity objects;
+    draw() blits the shared images at the array positions.
+    """
+    def __init__(self, enemy_count, bullet_capacity, seed=None):
+        self.rng = np.random.default_rng(seed)
+        self.enemy_x = np.zeros(enemy_count, np.int32)
+        self.enemy_y = np.zeros(enemy_count, np.int32)
+        self.enemy_vy = np.zeros(enemy_count, np.int32)
+        self.bullet_x = np.zeros(bullet_capacity, np.int32)
+        self.bullet_y = np.zeros(bullet_capacity, np.int32)
+        self.bullet_alive = np.zeros(bullet_capacity, bool)
+        self.reset()
+
+    def reset(self):
+        self.respawn(np.arange(len(self.enemy_x)))
+        self.bullet_alive[:] = False
+
+    def respawn(self, index):
+        """Places the enemies at index at random spots above the screen (like Enemy.activate)."""
+        count = len(index)
+        self.enemy_x[index] = self.rng.integers(0, SCREEN_WIDTH - ENEMY_WIDTH, count)
+        self.enemy_y[index] = self.rng.integers(-100, -40, count)
+        self.enemy_vy[index] = self.rng.integers(1, 4, count)
+
+    def fire(self, x, y):
+        """Fires a bullet with its bottom centre at (x, y); does nothing if all bullets are in flight."""
+        free = np.flatnonzero(~self.bullet_alive)
+        if len(free):
+            i = free[0]
+            self.bullet_x[i] = x - BULLET_WIDTH // 2
+            self.bullet_y[i] = y - BULLET_HEIGHT
+            self.bullet_alive[i] = True
+
+    def update(self):
+        """Moves everything one frame, respawning enemies off the bottom and dropping bullets off the top."""
+        self.enemy_y += self.enemy_vy
+        self.respawn(np.flatnonzero(self.enemy_y > SCREEN_HEIGHT + 10))
+        self.bullet_y += BULLET_SPEED_Y
+        self.bullet_alive &= self.bullet_y + BULLET_HEIGHT >= 0
+
+    def collide(self, player_rect):
+        """
+        Resolves bullet hits and returns (enemies hit, whether the player was hit).
+        Bullets are swept against the enemies sorted by x: searchsorted finds the
+        run of enemies overlapping each bullet horizontally, and only those pairs
+        get the vertical overlap test.
+        """
+        order = np.argsort(self.enemy_x, kind='stable')
+        sorted_x = self.enemy_x[order]
+        live = np.flatnonzero(self.bullet_alive)
+        bx = self.bullet_x[live]
+        by = self.bullet_y[live]
+        lo = np.searchsorted(sorted_x, bx - ENEMY_WIDTH, 'right')
+        hi = np.searchsorted(sorted_x, bx + BULLET_WIDTH, 'left')
+        counts = hi - lo
+        # Expand the runs into candidate (bullet, enemy) pairs
+        pair_bullet = np.repeat(np.arange(len(live)), counts)
+        run_offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        pair_enemy = order[np.repeat(lo, counts) + run_offset]
+        pair_by = by[pair_bullet]
+        pair_ey = self.enemy_y[pair_enemy]
+        overlap = (pair_ey < pair_by + BULLET_HEIGHT) & (pair_by < pair_ey + ENEMY_HEIGHT)
+        pair_bullet = pair_bullet[overlap]
+        pair_enemy = pair_enemy[overlap]
+        # Each bullet hits only the first enemy it overlaps
+        first = np.unique(pair_bullet, return_index=True)[1]
+        self.bullet_alive[live[pair_bullet[first]]] = False
+        hit = np.unique(pair_enemy[first])
+        self.respawn(hit)
+
+        r = player_rect
+        player_hit = np.any((self.enemy_x < r.right) & (r.left < self.enemy_x + ENEMY_WIDTH) &
+                            (self.enemy_y < r.bottom) & (r.top < self.enemy_y + ENEMY_HEIGHT))
+        return len(hit), bool(player_hit)
+
+    def draw(self, surface):
+        visible = np.flatnonzero(self.enemy_y > -ENEMY_HEIGHT)
+        surface.blits([(enemy_img, position) for position in
+                       zip(self.enemy_x[visible].tolist(), self.enemy_y[visible].tolist())], False)
+        live = np.flatnonzero(self.bullet_alive)
+        surface.blits([(bullet_img, position) for position in
+                       zip(self.bullet_x[live].tolist(), self.bullet_y[live].tolist())], False)
+
+class ScoreLabel:
+    """The score text, re-rendered with font.render only when the score changes."""
+    def __init__(self, font, position):
+        self.font = font
+        self.position = position
+        self.score = None
+        self.image = None
+        self.rect = pygame.Rect(position, (0, 0))
+
+    def set(self, score):
+        """Updates the text; returns the screen area it changed, or None if the score is unchanged."""
+        if score == self.score:
+            return None
+        old_rect = self.rect
+        self.score = score
+        self.image = self.font.render(f"Score: {score}", True, WHITE)
+        self.rect = self.image.get_rect(topleft=self.position)
+        return self.rect.union(old_rect)
+
+    def draw(self, surface):
+        surface.blit(self.image, self.rect)
+
+def show_go_screen(screen, font, clock):
+    """Displays the game over screen; returns False if the window was closed instead of a key pressed."""
     screen.fill(BLACK)
     title_text = font.render("GAME OVER", True, WHITE)
     instructions_text = font.render("Press any key to restart", True, WHITE)
     screen.blit(title_text, (SCREEN_WIDTH/2 - title_text.get_width()/2, SCREEN_HEIGHT/2 - 50))
     screen.blit(instructions_text, (SCREEN_WIDTH/2 - instructions_text.get_width()/2, SCREEN_HEIGHT/2 + 20))
     pygame.display.flip()
-    waiting = True
-    while waiting:
-        clock.tick(60)
+    while True:
+        clock.tick(FPS)
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
-                pygame.quit()
-                exit()
+                return False
             if event.type == pygame.KEYUP:
-                waiting = False
+                return True
+
+# --- Game State ---
+class GameState:
+    """
+    The whole simulation: player, enemies, bullets and score. step() advances
+    it by one fixed timestep from a FrameInput and never touches the display,
+    so it runs the same in the game window and headless. All randomness comes
+    from the seed, so the same seed and inputs always replay the same game.
+    """
+    def __init__(self, enemy_count, backend="sprites", dirty_rendering=False, seed=None):
+        self.seed = random.randrange(2**32) if seed is None else seed
+        self.rng = random.Random(self.seed)
+        # RenderUpdates.draw() reports the areas it changed, which dirty rendering pushes to the display
+        self.all_sprites = pygame.sprite.RenderUpdates() if dirty_rendering else pygame.sprite.Group()
+        self.enemies = pygame.sprite.Group()
+        self.bullets = pygame.sprite.Group()
+        self.enemy_count = enemy_count
+
+        self.player = Player()
+        self.all_sprites.add(self.player)
 
-# --- Sprite Groups ---
-all_sprites = pygame.sprite.Group()
-enemies = pygame.sprite.Group()
-bullets = pygame.sprite.Group()
+        if backend == "numpy":
+            # Enemies and bullets live in arrays; only the player is a sprite
+            self.world = ArrayWorld(enemy_count, BULLET_POOL_SIZE, self.seed)
+        else:
+            self.world = None
+            # Every bullet and enemy the game will use is created up front and recycled
+            self.bullet_pool = SpritePool(Bullet, BULLET_POOL_SIZE)
+            self.enemy_pool = SpritePool(functools.partial(Enemy, rng=self.rng), enemy_count)
+            self.enemy_grid = SpatialHash()
+        self.score = 0
+        self.game_over = False
+        self.reset()
 
-player = Player()
-all_sprites.add(player)
+    def reset(self):
+        """Starts a new game, returning every bullet and enemy to its pool."""
+        self.player.reset()
+        if self.world is not None:
+            self.world.reset()
+        else:
+            for sprite in self.bullets.sprites() + self.enemies.sprites():
+                sprite.deactivate()
+            for i in range(self.enemy_count):
+                self.spawn_enemy()
+        self.score = 0
+        self.game_over = False
 
-for i in range(8): # Create 8 enemies initially
-    e = Enemy()
-    all_sprites.add(e)
-    enemies.add(e)
+    def spawn_enemy(self):
+        """Takes an enemy from the pool and places it above the screen."""
+        enemy = self.enemy_pool.acquire(self.all_sprites, self.enemies)
+        if enemy is not None:
+            enemy.activate()
+
+    def shoot(self):
+        """Fires a bullet from the player; does nothing if all bullets are in flight."""
+        x, y = self.player.rect.centerx, self.player.rect.top
+        if self.world is not None:
+            self.world.fire(x, y)
+            return
+        bullet = self.bullet_pool.acquire(self.all_sprites, self.bullets)
+        if bullet is not None:
+            bullet.activate(x, y)
+
+    def step(self, frame_input):
+        """Advances the game by one frame; sets game_over if the player was hit."""
+        for i in range(frame_input.shots):
+            self.shoot()
+
+        # --- Update ---
+        self.player.steer(frame_input)
+        self.all_sprites.update()
+        if self.world is not None:
+            self.world.update()
+
+        # --- Collision Detection ---
+        if self.world is not None:
+            enemies_hit, player_hit = self.world.collide(self.player.rect)
+            self.score += 10 * enemies_hit
+            if player_hit:
+                self.game_over = True
+            return
+
+        # Enemies are filed in a spatial hash so bullets and the player are only
+        # tested against the enemies around them
+        self.enemy_grid.rebuild(self.enemies)
+
+        # Check for bullet-enemy collisions
+        hits = collide_bullets(self.enemy_grid, self.bullets)
+        for hit in hits:
+            self.score += 10 # Increase score for each hit
+            self.spawn_enemy() # Bring the pooled enemy back to replace the one hit
+
+        # Check for player-enemy collisions
+        hits = self.enemy_grid.query(self.player.rect)
+        if hits:
+            self.game_over = True
+
+    def entity_counts(self):
+        """Returns (enemies, bullets in flight)."""
+        if self.world is not None:
+            return len(self.world.enemy_x), int(self.world.bullet_alive.sum())
+        return len(self.enemies), len(self.bullets)
+
+    def draw(self, surface):
+        """Draws the whole scene (except the score)."""
+        surface.blit(background, (0, 0))
+        self.all_sprites.draw(surface)
+        if self.world is not None:
+            self.world.draw(surface)
 
 # --- Game Loop ---
-game_over = False
-running = True
-score = 0
-
-while running:
-    if game_over:
-        show_go_screen()
-        game_over = False
-        # Reset the game
-        all_sprites = pygame.sprite.Group()
-        enemies = pygame.sprite.Group()
-        bullets = pygame.sprite.Group()
-        player = Player()
-        all_sprites.add(player)
-        for i in range(8):
-            e = Enemy()
-            all_sprites.add(e)
-            enemies.add(e)
-        score = 0
-
-    # --- Process Events ---
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-        elif event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_SPACE:
-                player.shoot()
-
-    # --- Update ---
-    all_sprites.update()
-
-    # --- Collision Detection ---
-    # Check for bullet-enemy collisions
-    hits = pygame.sprite.groupcollide(enemies, bullets, True, True)
-    for hit in hits:
-        score += 10 # Increase score for each hit
-        e = Enemy() # Create a new enemy to replace the one hit
-        all_sprites.add(e)
-        enemies.add(e)
-
-    # Check for player-enemy collisions
-    hits = pygame.sprite.spritecollide(player, enemies, False)
-    if hits:
-        game_over = True
-
-    # --- Draw / Render ---
-    screen.fill(BLACK)
-    all_sprites.draw(screen)
+def run_game(enemy_count, backend, render, uncapped=False, seed=None, record_path=None):
+    """Runs the game in a window until it is closed, optionally recording a replay."""
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("Space Shooter")
+    clock = pygame.time.Clock()
+    font = pygame.font.Font(None, 36)
 
-    # Draw the score
-    score_text = font.render(f"Score: {score}", True, WHITE)
-    screen.blit(score_text, (10, 10))
+    dirty_rendering = render == "dirty" and backend == "sprites"
+    state = GameState(enemy_count, backend, dirty_rendering, seed)
+    score_label = ScoreLabel(font, (10, 10))
+    recorder = ReplayRecorder(record_path, state.seed, enemy_count, backend) if record_path else None
 
-    # --- Flip Display ---
-    pygame.display.flip()
+    # The pooled sprites live for the whole game; moving them out of the tracked
+    # generations keeps the garbage collector from rescanning them
+    gc.freeze()
+
+    running = True
+    full_redraw = True # Dirty rendering starts from (and after game over returns to) a full frame
+    while running:
+        if state.game_over:
+            if not show_go_screen(screen, font, clock):
+                break
+            state.reset()
+            full_redraw = True
+
+        # --- Process Events ---
+        shots = 0
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE:
+                    shots += 1
+        keystate = pygame.key.get_pressed()
+        frame_input = FrameInput(keystate[pygame.K_LEFT], keystate[pygame.K_RIGHT], shots)
+        if recorder is not None:
+            recorder.record(frame_input)
+        state.step(frame_input)
+
+        # --- Draw / Render ---
+        score_area = score_label.set(state.score)
+        if dirty_rendering and not full_redraw:
+            # Erase the sprites where they were drawn last frame, redraw them and
+            # update only those areas (and the score, if it changed) on the display
+            state.all_sprites.clear(screen, background)
+            # The antialiased text is blended onto whatever is under it, so it is
+            # always redrawn onto clean background
+            screen.blit(background, score_area or score_label.rect, score_area or score_label.rect)
+            dirty_rects = state.all_sprites.draw(screen)
+            score_label.draw(screen)
+            if score_area:
+                dirty_rects.append(score_area)
+            if len(dirty_rects) > MAX_DIRTY_RECTS:
+                pygame.display.flip()
+            else:
+                pygame.display.update(dirty_rects)
+        else:
+            state.draw(screen)
+            score_label.draw(screen)
+
+            # --- Flip Display ---
+            pygame.display.flip()
+            full_redraw = False
+
+        # --- Control Frame Rate ---
+        if not uncapped:
+            clock.tick(FPS)
+
+    if recorder is not None:
+        recorder.close()
+        print(f"Replay saved to {record_path} ({recorder.frames} frames, seed {state.seed})")
+    pygame.quit()
+
+# --- Replays ---
+# A replay file is a header (magic, format version, seed, enemy count, backend)
+# followed by one byte per frame: bit 0 left, bit 1 right, bits 2-7 SPACE presses.
+REPLAY_MAGIC = b"SHRP"
+REPLAY_VERSION = 1
+REPLAY_HEADER = struct.Struct("<4sBQIB")
+MAX_SEED = 2**64 - 1 # Seeds are stored as unsigned 64-bit integers
+BACKENDS = ("sprites", "numpy")
+INPUT_CODES = [FrameInput(bool(code & 1), bool(code & 2), code >> 2) for code in range(256)] # byte -> FrameInput
+
+def encode_input(frame_input):
+    return frame_input.left | frame_input.right << 1 | min(frame_input.shots, 63) << 2
+
+class ReplayRecorder:
+    """Writes a replay file: the header, then one byte per frame as the game runs."""
+    def __init__(self, path, seed, enemy_count, backend):
+        self.file = open(path, "wb")
+        self.file.write(REPLAY_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, seed, enemy_count, BACKENDS.index(backend)))
+        self.frames = 0
+
+    def record(self, frame_input):
+        self.file.write(bytes((encode_input(frame_input),)))
+        self.frames += 1
+
+    def close(self):
+        self.file.close()
+
+def read_replay(path):
+    """Returns (seed, enemy count, backend, per-frame input bytes) from a replay file."""
+    with open(path, "rb") as file:
+        data = file.read()
+    if len(data) < REPLAY_HEADER.size:
+        raise ValueError(f"{path} is not a replay file")
+    magic, version, seed, enemy_count, backend = REPLAY_HEADER.unpack_from(data)
+    if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+        raise ValueError(f"{path} is not a version {REPLAY_VERSION} replay file")
+    return seed, enemy_count, BACKENDS[backend], data[REPLAY_HEADER.size:]
+
+# --- Benchmark ---
+def scripted_input(frame):
+    """Deterministic benchmark input: sweep left and right across the screen, firing every 6th frame."""
+    heading_right = (frame // 90) % 2 == 0
+    return FrameInput(not heading_right, heading_right, 1 if frame % 6 == 0 else 0)
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def run_frames(state, inputs, surface=None, reset_on_game_over=False):
+    """
+    Steps state through inputs as fast as possible, timing each frame (and
+    drawing it to surface, if given). Returns (sorted frame times, bullets in
+    flight per frame, game overs).
+    """
+    frame_times = []
+    bullet_counts = []
+    game_overs = 0
+    for frame_input in inputs:
+        frame_start = time.perf_counter()
+        state.step(frame_input)
+        if surface is not None:
+            state.draw(surface)
+        frame_times.append(time.perf_counter() - frame_start)
+        if state.game_over:
+            game_overs += 1
+            if reset_on_game_over:
+                state.reset()
+            else:
+                state.game_over = False
+        bullet_counts.append(state.entity_counts()[1])
+    frame_times.sort()
+    return frame_times, bullet_counts, game_overs
+
+def print_frame_report(title, elapsed, frame_times, bullet_counts, game_overs, state):
+    frames = len(frame_times)
+    print(f"{frames} frames ({title}) in {elapsed:.2f}s: {frames / elapsed:.0f} frames/s, "
+          f"{frames / FPS / elapsed:.0f}x real time")
+    if not frames:
+        return
+    print("frame time ms: " + "  ".join(
+        f"{name} {percentile(frame_times, pct) * 1000:.3f}"
+        for name, pct in (("p50", 50), ("p95", 95), ("p99", 99), ("max", 100))))
+    print(f"entities: {state.entity_counts()[0]} enemies, "
+          f"bullets in flight mean {sum(bullet_counts) / frames:.1f} max {max(bullet_counts)}; "
+          f"score {state.score}, game overs {game_overs}")
+
+def bench(frames, enemy_count, backend, draw=False, seed=None):
+    """
+    Runs the simulation headless, as fast as possible, for the given number of
+    fixed-timestep frames with scripted input, and prints frame-time
+    percentiles and entity counts. No display is opened; with draw=True each
+    frame is also drawn to an offscreen surface. A player hit is counted but
+    does not end the run, so the workload stays the same throughout.
+    """
+    surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)) if draw else None
+    state = GameState(enemy_count, backend, seed=seed)
+    gc.freeze()
+    start = time.perf_counter()
+    results = run_frames(state, (scripted_input(frame) for frame in range(frames)), surface)
+    elapsed = time.perf_counter() - start
+    title = f"{backend} backend, {enemy_count} enemies, seed {state.seed}{', drawing' if draw else ''}"
+    print_frame_report(title, elapsed, *results, state)
+
+def replay(path, draw=False):
+    """
+    Re-simulates a recorded game headless at unlimited speed. Same seed and
+    inputs give the same game, so the final score matches the recorded one and
+    the replay doubles as a repeatable performance workload.
+    """
+    seed, enemy_count, backend, codes = read_replay(path)
+    surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)) if draw else None
+    state = GameState(enemy_count, backend, seed=seed)
+    gc.freeze()
+    start = time.perf_counter()
+    results = run_frames(state, (INPUT_CODES[code] for code in codes), surface, reset_on_game_over=True)
+    elapsed = time.perf_counter() - start
+    title = f"replay of {path}: {backend} backend, {enemy_count} enemies, seed {seed}{', drawing' if draw else ''}"
+    print_frame_report(title, elapsed, *results, state)
 
-    # --- Control Frame Rate ---
-    clock.tick(60)
+def parse_args():
+    parser = argparse.ArgumentParser(description="Space Shooter")
+    parser.add_argument("--enemies", type=int, default=ENEMY_COUNT,
+                        help="enemies on screen at once (default: %(default)s)")
+    parser.add_argument("--backend", choices=["sprites", "numpy"], default="sprites",
+                        help="entity simulation: one sprite per entity, or NumPy arrays "
+                             "for very large enemy counts (default: %(default)s)")
+    parser.add_argument("--render", choices=["full", "dirty"], default="full",
+                        help="redraw and flip the whole screen every frame, or only redraw and "
+                             "update the areas that changed (sprites backend only; default: %(default)s)")
+    parser.add_argument("--uncapped", action="store_true",
+                        help="step and draw as fast as possible instead of at %d FPS" % FPS)
+    parser.add_argument("--bench", type=int, metavar="FRAMES",
+                        help="simulate FRAMES frames headless with scripted input and report frame times")
+    parser.add_argument("--bench-draw", action="store_true",
+                        help="with --bench or --replay, also draw every frame to an offscreen surface")
+    parser.add_argument("--seed", type=int,
+                        help="seed for enemy spawns, 0 to 2**64-1 (default: random; shown in reports "
+                             "and stored in replays)")
+    parser.add_argument("--record", metavar="PATH", help="record the game's input to a replay file")
+    parser.add_argument("--replay", metavar="PATH",
+                        help="re-simulate a recorded game headless as fast as possible and report frame times")
+    args = parser.parse_args()
+    if args.backend == "numpy" and np is None:
+        parser.error("--backend numpy requires NumPy")
+    if args.seed is not None and not 0 <= args.seed <= MAX_SEED:
+        parser.error("--seed must be between 0 and 2**64-1")
+    return args
 
-pygame.quit()
+if __name__ == "__main__":
+    args = parse_args()
+    if args.replay:
+        replay(args.replay, args.bench_draw)
+    elif args.bench:
+        bench(args.bench, args.enemies, args.backend, args.bench_draw, args.seed)
+    else:
+        run_game(args.enemies, args.backend, args.render, args.uncapped, args.seed, args.record)
@@ -0,0 +1,57 @@
+import http.client
+import threading
+import time
+import unittest
+from unittest import mock
+
+import webApplication
+
+
+class IdleConnectionWatcherTest(unittest.TestCase):
+    """Keep-alive connections parked with the watcher thread of the threaded server."""
+
+    def setUp(self):
+        patcher = mock.patch.object(webApplication, "KEEPALIVE_TIMEOUT", 0.3)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.server = webApplication.make_server(0, "threaded", max_workers=2, host="127.0.0.1")
+        self.addCleanup(self.server.server_close)
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.shutdown)
+
+    def connect(self):
+        connection = http.client.HTTPConnection("127.0.0.1", self.server.server_address[1], timeout=3)
+        self.addCleanup(connection.close)
+        return connection
+
+    def get(self, connection, path, **headers):
+        connection.request("GET", path, headers=headers)
+        response = connection.getresponse()
+        response.read()
+        return response.status
+
+    def test_park_dispatch_close_then_park_again(self):
+        connection = self.connect()
+        self.assertEqual(self.get(connection, "/api/products/1"), 200) # Parked
+        time.sleep(0.1)
+        # Dispatched from the watcher, then closed by the worker
+        self.assertEqual(self.get(connection, "/api/products/1", Connection="close"), 200)
+        time.sleep(0.5) # Past the deadline the connection had while it was parked
+        self.assertTrue(self.server._idle_watcher.is_alive())
+
+        connection = self.connect()
+        self.assertEqual(self.get(connection, "/api/products/1"), 200) # Parked again
+        time.sleep(0.1)
+        self.assertEqual(self.get(connection, "/api/products/2"), 200) # Dispatched again
+
+    def test_idle_connection_closed_after_timeout(self):
+        connection = self.connect()
+        self.assertEqual(self.get(connection, "/api/products/1"), 200)
+        time.sleep(0.6)
+        self.assertEqual(connection.sock.recv(1), b"") # Closed by the server
+        self.assertTrue(self.server._idle_watcher.is_alive())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,11 +1,59 @@
 import http.server
-import socketserver
 import urllib.parse
 import json
 import os
+import argparse
+import signal
+import threading
+import concurrent.futures
+import functools
+import itertools
+import collections
+import secrets
+import http.cookies
+import bisect
+import csv
+import random
+import re
+import timeit
+import hashlib
+import gzip
+import email.utils
+import tracemalloc
+import time
+import sys
+import queue
+import selectors
+import socket
+import contextlib
+import importlib.util
+import logging
+import logging.handlers
+
+try:
+    import brotli # Optional: enables a Brotli-compressed variant of static assets
+except ImportError:
+    brotli = None
 
 # --- Configuration ---
 PORT = 8000 # Port to run the web server on
+SERVING_MODE = "threaded" # "threaded" (bounded worker pool) or "single" (one request at a time)
+MAX_WORKERS = 32 # Upper bound on concurrently served connections in threaded mode
+LISTEN_BACKLOG = 128 # Pending connections the kernel queues while all workers are busy
+KEEPALIVE_TIMEOUT = 5 # Seconds an idle keep-alive connection is kept open (idle connections hold no worker)
+SESSION_COOKIE = "store_session" # Cookie that carries the visitor's cart session id
+SESSION_TTL = 30 * 60 # Seconds of inactivity before a cart is discarded
+MAX_SESSIONS = 10000 # Least recently used carts are discarded beyond this many
+LISTING_CACHE_SIZE = 256 # Rendered category listings kept by the fragment cache
+PAGE_SIZE = 24 # Products per page unless ?page_size= says otherwise
+MAX_PAGE_SIZE = 100 # Upper bound for ?page_size=
+STREAM_BATCH = 8 # Product cards rendered between flushes of a streamed page
+STREAM_CHUNK_SIZE = 16 * 1024 # Buffered bytes that force a chunk out even between flushes
+API_CACHE_SIZE = 1024 # Serialized JSON API responses kept in memory
+MAX_REQUEST_BODY = 64 * 1024 # Largest JSON request body the API accepts
+ACCESS_LOG_QUEUE_SIZE = 10000 # Access log lines waiting to be written; more are dropped
+# Upper bounds (seconds) of the latency histogram buckets exposed on /metrics
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
 
 # Product data - this would typically come from a database
 products_data_json = """
@@ -22,275 +70,765 @@ products_data_json = """
   { "id": 10, "name": "Cooking Guide", "category": "Books", "price": 20.00, "image": "https://placehold.co/150x150/F0F8FF/000000?text=Cookbook" }
 ]
 """
-PRODUCTS = json.loads(products_data_json)
-
-# Get unique categories from the product data
-CATEGORIES = ['All'] + sorted(list(set(product['category'] for product in PRODUCTS)))
-
-# Global shopping cart (shared by all users in this simple example)
-# In a real app, this would be per-user session data
-shopping_cart = []
 
-class MyHandler(http.server.SimpleHTTPRequestHandler):
+# --- Product Catalog ---
+class Catalog:
     """
-    Custom HTTP request handler to serve the product display web application.
+    In-memory product catalog with the indexes the request handlers need:
+    an id -> product hash index, category -> products posting lists (in
+    catalog order), and price-sorted indexes for range queries.
     """
-    def do_GET(self):
+    _versions = itertools.count(1)
+
+    def __init__(self, products):
+        self.version = next(self._versions) # Distinguishes catalogs in cache keys
+        self.products = list(products)
+        self.by_id = {}
+        self.by_category = {}
+        for product in self.products:
+            self.by_id[product['id']] = product
+            self.by_category.setdefault(product['category'], []).append(product)
+        self.categories = ['All'] + sorted(self.by_category)
+        # product id -> (product, compiled card), filled by _product_card_template.
+        # Holds at most one card per product and goes away with the catalog.
+        self.card_templates = {}
+
+        # category (None = whole catalog) -> (sorted prices, products in the same order)
+        self._price_indexes = {}
+        for category, products in [(None, self.products)] + list(self.by_category.items()):
+            by_price = sorted(products, key=lambda p: p['price'])
+            self._price_indexes[category] = ([p['price'] for p in by_price], by_price)
+
+    def __len__(self):
+        return len(self.products)
+
+    def get(self, product_id):
+        """Returns the product with the given id, or None."""
+        return self.by_id.get(product_id)
+
+    def in_category(self, category):
+        """Returns the products in a category ('All' for the whole catalog)."""
+        if category == 'All':
+            return self.products
+        return self.by_category.get(category, [])
+
+    def price_range(self, min_price=None, max_price=None, category='All'):
+        """Returns products priced within [min_price, max_price], cheapest first."""
+        by_price, lo, hi = self.price_range_bounds(min_price, max_price, category)
+        return by_price[lo:hi]
+
+    def price_range_bounds(self, min_price=None, max_price=None, category='All'):
         """
-        Handles GET requests for the web application.
-        Parses URLs to display products, add to cart, or remove from cart.
+        Like price_range, but returns (products sorted by price, lo, hi) so callers
+        can take a page of the range without copying all of it.
         """
-        global shopping_cart # Declare global here, at the start of the method
+        index = self._price_indexes.get(None if category == 'All' else category)
+        if index is None:
+            return [], 0, 0
+        prices, by_price = index
+        lo = 0 if min_price is None else bisect.bisect_left(prices, min_price)
+        hi = len(prices) if max_price is None else bisect.bisect_right(prices, max_price)
+        return by_price, lo, max(lo, hi)
 
-        parsed_url = urllib.parse.urlparse(self.path)
-        path = parsed_url.path
-        query_params = urllib.parse.parse_qs(parsed_url.query)
+    @classmethod
+    def from_json(cls, text):
+        return cls(cls._normalize(record) for record in json.loads(text))
 
-        current_category = query_params.get('category', ['All'])[0]
-        redirect_path = '/' # Default redirect path
+    @classmethod
+    def from_csv(cls, file):
+        """Reads a CSV file with id, name, category, price and image columns."""
+        return cls(cls._normalize(record) for record in csv.DictReader(file))
 
-        if path == '/add_to_cart':
-            product_id = int(query_params.get('product_id', [0])[0])
-            product_to_add = next((p for p in PRODUCTS if p['id'] == product_id), None)
-            if product_to_add:
-                found = False
-                for item in shopping_cart:
-                    if item['id'] == product_id:
-                        item['quantity'] += 1
-                        found = True
-                        break
-                if not found:
-                    shopping_cart.append({
-                        'id': product_to_add['id'],
-                        'name': product_to_add['name'],
-                        'price': product_to_add['price'],
-                        'image': product_to_add['image'],
-                        'quantity': 1
-                    })
-            # Redirect back to the product list, preserving the category
-            redirect_path = f"/?category={current_category}"
-            self.send_response(302) # Found (redirect)
-            self.send_header('Location', redirect_path)
-            self.end_headers()
-            return
+    @classmethod
+    def load(cls, path):
+        """Loads a catalog from a .json or .csv file."""
+        with open(path, newline='', encoding='utf-8') as file:
+            if path.lower().endswith('.csv'):
+                return cls.from_csv(file)
+            return cls.from_json(file.read())
 
-        elif path == '/remove_from_cart':
-            product_id = int(query_params.get('product_id', [0])[0])
-            new_cart = []
-            for item in shopping_cart:
-                if item['id'] == product_id:
-                    if item['quantity'] > 1:
-                        item['quantity'] -= 1
-                        new_cart.append(item)
-                else:
-                    new_cart.append(item)
-            shopping_cart = new_cart # Update the global cart
-            # Redirect back to the product list, preserving the category
-            redirect_path = f"/?category={current_category}"
-            self.send_response(302) # Found (redirect)
-            self.send_header('Location', redirect_path)
-            self.end_headers()
-            return
+    @staticmethod
+    def _normalize(record):
+        return {
+            'id': int(record['id']),
+            'name': record['name'],
+            'category': record['category'],
+            'price': float(record['price']),
+            'image': record['image'],
+        }
 
-        # Handle serving the main page
-        self.send_response(200)
-        self.send_header("Content-type", "text/html")
-        self.end_headers()
 
-        # Filter products based on selected category
-        filtered_products = []
-        if current_category == 'All':
-            filtered_products = PRODUCTS
-        else:
-            filtered_products = [p for p in PRODUCTS if p['category'] == current_category]
+CATALOG = Catalog.from_json(products_data_json)
+PRODUCTS = CATALOG.products
+CATEGORIES = CATALOG.categories
+
+def load_catalog(path):
+    """Replaces the built-in sample products with a catalog file (called at startup)."""
+    global CATALOG, PRODUCTS, CATEGORIES
+    CATALOG = Catalog.load(path)
+    PRODUCTS = CATALOG.products
+    CATEGORIES = CATALOG.categories
+    LISTING_CACHE.invalidate() # Old entries are keyed by the previous version; free them now
+    API_CACHE.invalidate()
+    print(f"Loaded {len(CATALOG)} products in {len(CATEGORIES) - 1} categories from {path}")
+
+# --- Shopping Carts ---
+class Cart:
+    """
+    One visitor's cart: product id -> cart line, with the total kept up to date
+    on every change instead of being summed on each page render.
+    """
+    def __init__(self):
+        self.lines = {} # product_id -> {'id', 'name', 'price', 'image', 'quantity'}; keeps insertion order
+        self.total_cents = 0 # Integer cents, so repeated add/remove cannot drift
+        self.lock = threading.Lock()
+
+    def add(self, product, quantity=1):
+        """Adds quantity units of product and returns the new quantity."""
+        with self.lock:
+            line = self.lines.get(product['id'])
+            if line is None:
+                line = self.lines[product['id']] = {
+                    'id': product['id'],
+                    'name': product['name'],
+                    'price': product['price'],
+                    'image': product['image'],
+                    'quantity': 0
+                }
+            line['quantity'] += quantity
+            self.total_cents += round(line['price'] * 100) * quantity
+            return line['quantity']
+
+    def remove(self, product_id, quantity=1):
+        """Removes up to quantity units of product_id and returns the new quantity (0 if gone)."""
+        with self.lock:
+            line = self.lines.get(product_id)
+            if line is None:
+                return 0
+            quantity = min(quantity, line['quantity'])
+            line['quantity'] -= quantity
+            self.total_cents -= round(line['price'] * 100) * quantity
+            if line['quantity'] == 0:
+                del self.lines[product_id]
+            return line['quantity']
+
+    @property
+    def total(self):
+        return self.total_cents / 100
+
+    def snapshot(self):
+        """Returns (lines, total) copied under the lock, for rendering."""
+        with self.lock:
+            return [dict(line) for line in self.lines.values()], self.total
 
-        # Calculate cart total
-        cart_total = sum(item['price'] * item['quantity'] for item in shopping_cart)
+    def delta(self, product_id):
+        """The change a cart update made, as returned by the JSON API."""
+        with self.lock:
+            line = self.lines.get(product_id)
+            return {
+                'product_id': product_id,
+                'quantity': line['quantity'] if line else 0,
+                'cart_total': self.total,
+                'cart_lines': len(self.lines),
+            }
+
+
+class CartStore:
+    """
+    Carts keyed by session id, safe to use from concurrent request threads.
+
+    Sessions are kept in least-recently-used order: every access moves a
+    session to the back, so expired sessions (idle longer than ttl) and the
+    overflow beyond max_sessions are always trimmed from the front.
+    """
+    def __init__(self, ttl=SESSION_TTL, max_sessions=MAX_SESSIONS):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions = collections.OrderedDict() # session_id -> (cart, last_access)
+        self._lock = threading.Lock()
 
-        # Generate HTML content
-        html_content = self._generate_html(filtered_products, CATEGORIES, current_category, shopping_cart, cart_total)
-        self.wfile.write(html_content.encode('utf-8'))
+    def __len__(self):
+        return len(self._sessions)
 
-    def _generate_html(self, products, categories, selected_category, cart, cart_total):
+    def get(self, session_id):
+        """Returns the cart for session_id, or None if it is unknown or expired."""
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            self._sessions[session_id] = (entry[0], now)
+            self._sessions.move_to_end(session_id)
+            return entry[0]
+
+    def create(self):
+        """Starts a new session and returns (session_id, cart)."""
+        session_id = secrets.token_urlsafe(18)
+        cart = Cart()
+        now = time.monotonic()
+        with self._lock:
+            self._sessions[session_id] = (cart, now)
+            self._evict(now)
+        return session_id, cart
+
+    def _evict(self, now):
+        sessions = self._sessions
+        while sessions:
+            session_id, (_, last_access) = next(iter(sessions.items()))
+            if len(sessions) <= self.max_sessions and now - last_access <= self.ttl:
+                break
+            del sessions[session_id]
+
+
+CARTS = CartStore()
+
+# --- Static Assets ---
+class StaticAsset:
+    """
+    An in-memory static file served with long-lived caching.
+
+    The URL embeds a hash of the content, so a changed file gets a new URL and
+    browsers may cache each version forever. Compressed variants are built once
+    at startup and picked per request from Accept-Encoding.
+    """
+    def __init__(self, name, content, content_type, last_modified=None):
+        self.body = content.encode('utf-8')
+        self.content_type = content_type
+        self.content_hash = hashlib.sha256(self.body).hexdigest()[:16]
+        stem, ext = os.path.splitext(name)
+        self.url = f"/static/{stem}.{self.content_hash}{ext}"
+        self.last_modified = email.utils.formatdate(last_modified or time.time(), usegmt=True)
+        # encoding -> (body, etag); each representation gets its own strong ETag
+        self.variants = {'identity': (self.body, f'"{self.content_hash}"')}
+        self.variants['gzip'] = (gzip.compress(self.body, compresslevel=9, mtime=0), f'"{self.content_hash}-gzip"')
+        if brotli is not None:
+            self.variants['br'] = (brotli.compress(self.body), f'"{self.content_hash}-br"')
+
+    def choose_encoding(self, accept_encoding):
+        """Picks the smallest variant the client accepts (q > 0)."""
+        accepted = set()
+        for token in (accept_encoding or "").split(','):
+            coding, _, params = token.strip().partition(';')
+            params = params.replace(' ', '')
+            if params.startswith('q='):
+                try:
+                    if float(params[2:]) == 0:
+                        continue
+                except ValueError:
+                    continue # Ignore codings with a malformed q-value
+            accepted.add(coding.strip().lower())
+        for encoding in ('br', 'gzip'):
+            if encoding in self.variants and (encoding in accepted or '*' in accepted):
+                return encoding
+        return 'identity'
+
+    def is_fresh(self, if_none_match, if_modified_since):
+        """True when the client's cached copy is still valid (answer with 304)."""
+        if if_none_match is not None:
+            # If-None-Match takes precedence over If-Modified-Since
+            tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+            return '*' in tags or any(etag in tags for _, etag in self.variants.values())
+        if if_modified_since is not None:
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            return since >= email.utils.parsedate_to_datetime(self.last_modified)
+        return False
+
+
+STORE_CSS = """/* Basic Tailwind-like classes for styling */
+body {
+    font-family: 'Inter', sans-serif;
+    margin: 0;
+    background-color: #f3f4f6; /* gray-100 */
+    color: #1f2937; /* gray-900 */
+}
+.container {
+    max-width: 1200px;
+    margin: 0 auto;
+    padding: 1.5rem; /* p-6 */
+}
+.header {
+    background-color: #4f46e5; /* indigo-700 */
+    color: white;
+    padding: 1rem; /* p-4 */
+    box-shadow: 0 2px 4px rgba(0, 0, 0, 0.1); /* shadow-md */
+    display: flex;
+    justify-content: space-between;
+    align-items: center;
+}
+.header h1 {
+    font-size: 1.5rem; /* text-2xl */
+    font-weight: bold;
+}
+.relative {
+    position: relative;
+}
+.absolute {
+    position: absolute;
+}
+.-top-2 { top: -0.5rem; }
+.-right-2 { right: -0.5rem; }
+.bg-red-500 { background-color: #ef4444; }
+.text-white { color: white; }
+.text-xs { font-size: 0.75rem; }
+.font-bold { font-weight: bold; }
+.rounded-full { border-radius: 9999px; }
+.h-5 { height: 1.25rem; }
+.w-5 { width: 1.25rem; }
+.flex { display: flex; }
+.items-center { align-items: center; }
+.justify-center { justify-content: center; }
+.grid { display: grid; }
+.grid-cols-1 { grid-template-columns: repeat(1, minmax(0, 1fr)); }
+.lg\\:grid-cols-4 { /* Escaped colon for CSS class name */
+    grid-template-columns: repeat(4, minmax(0, 1fr));
+}
+.gap-6 { gap: 1.5rem; }
+.bg-white { background-color: white; }
+.rounded-lg { border-radius: 0.5rem; }
+.shadow-md { box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.1), 0 2px 4px -1px rgba(0, 0, 0, 0.06); }
+.p-6 { padding: 1.5rem; }
+.h-fit { height: fit-content; }
+.sticky { position: sticky; }
+.top-4 { top: 1rem; }
+.text-xl { font-size: 1.25rem; }
+.mb-4 { margin-bottom: 1rem; }
+.text-gray-800 { color: #1f2937; }
+.space-y-2 > *:not([hidden]) ~ *:not([hidden]) { margin-top: 0.5rem; }
+.block { display: block; }
+.w-full { width: 100%; }
+.text-left { text-align: left; }
+.px-4 { padding-left: 1rem; padding-right: 1rem; }
+.py-2 { padding-top: 0.5rem; padding-bottom: 0.5rem; }
+.rounded-md { border-radius: 0.375rem; }
+.transition-colors { transition-property: background-color, border-color, color, fill, stroke; transition-timing-function: cubic-bezier(0.4, 0, 0.2, 1); transition-duration: 150ms; }
+.duration-200 { transition-duration: 200ms; }
+.bg-indigo-100 { background-color: #e0e7ff; }
+.text-indigo-700 { color: #4338ca; }
+.font-semibold { font-weight: 600; }
+.text-gray-700 { color: #374151; }
+.hover\\:bg-gray-100:hover { background-color: #f3f4f6; }
+.text-2xl { font-size: 1.5rem; }
+.mb-6 { margin-bottom: 1.5rem; }
+.sm\\:grid-cols-2 {
+    grid-template-columns: repeat(2, minmax(0, 1fr));
+}
+.md\\:grid-cols-2 {
+    grid-template-columns: repeat(2, minmax(0, 1fr));
+}
+.lg\\:grid-cols-2 {
+    grid-template-columns: repeat(2, minmax(0, 1fr));
+}
+.xl\\:grid-cols-3 {
+    grid-template-columns: repeat(3, minmax(0, 1fr));
+}
+.p-4 { padding: 1rem; }
+.flex-col { flex-direction: column; }
+.items-center { align-items: center; }
+.justify-between { justify-content: space-between; }
+.transform { transform: var(--tw-transform); }
+.transition-transform { transition-property: transform; transition-timing-function: cubic-bezier(0.4, 0, 0.2, 1); transition-duration: 150ms; }
+.hover\\:scale-105:hover { transform: scale(1.05); }
+.w-32 { width: 8rem; }
+.h-32 { height: 8rem; }
+.object-cover { object-fit: cover; }
+.mb-4 { margin-bottom: 1rem; }
+.text-lg { font-size: 1.125rem; }
+.text-center { text-align: center; }
+.text-sm { font-size: 0.875rem; }
+.text-gray-600 { color: #4b5563; }
+.mb-2 { margin-bottom: 0.5rem; }
+.text-indigo-600 { color: #4f46e5; }
+.bg-indigo-500 { background-color: #6366f1; }
+.hover\\:bg-indigo-600:hover { background-color: #4f46e5; }
+.focus\\:outline-none:focus { outline: 2px solid transparent; outline-offset: 2px; }
+.focus\\:ring-2:focus { box-shadow: 0 0 0 2px var(--tw-ring-color); }
+.focus\\:ring-indigo-500:focus { --tw-ring-color: #6366f1; }
+.focus\\:ring-opacity-50:focus { --tw-ring-opacity: 0.5; }
+.bg-gray-50 { background-color: #f9fafb; }
+.p-3 { padding: 0.75rem; }
+.shadow-sm { box-shadow: 0 1px 2px 0 rgba(0, 0, 0, 0.05); }
+.mb-2 { margin-bottom: 0.5rem; }
+.w-12 { width: 3rem; }
+.h-12 { height: 3rem; }
+.mr-3 { margin-right: 0.75rem; }
+.font-medium { font-weight: 500; }
+.bg-red-500 { background-color: #ef4444; }
+.px-3 { padding-left: 0.75rem; padding-right: 0.75rem; }
+.py-1 { padding-top: 0.25rem; padding-bottom: 0.25rem; }
+.hover\\:bg-red-600:hover { background-color: #dc2626; }
+.text-gray-500 { color: #6b7280; }
+.space-y-3 > *:not([hidden]) ~ *:not([hidden]) { margin-top: 0.75rem; }
+.max-h-80 { max-height: 20rem; }
+.overflow-y-auto { overflow-y: auto; }
+.pr-2 { padding-right: 0.5rem; }
+.border-t { border-top-width: 1px; border-color: #e5e7eb; /* gray-200 */ }
+.pt-4 { padding-top: 1rem; }
+.mt-4 { margin-top: 1rem; }
+.bg-green-500 { background-color: #22c55e; }
+.hover\\:bg-green-600:hover { background-color: #16a34a; }
+.focus\\:ring-green-500:focus { --tw-ring-color: #22c55e; }
+
+/* Custom scrollbar for cart */
+.overflow-y-auto::-webkit-scrollbar {
+    width: 8px;
+}
+.overflow-y-auto::-webkit-scrollbar-track {
+    background: #f1f1f1;
+    border-radius: 10px;
+}
+.overflow-y-auto::-webkit-scrollbar-thumb {
+    background: #888;
+    border-radius: 10px;
+}
+.overflow-y-auto::-webkit-scrollbar-thumb:hover {
+    background: #555;
+}
+
+/* Responsive adjustments */
+@media (min-width: 1024px) { /* lg breakpoint */
+    .lg\\:col-span-1 { grid-column: span 1 / span 1; }
+    .lg\\:col-span-2 { grid-column: span 2 / span 2; }
+    .lg\\:grid-cols-2 { grid-template-columns: repeat(2, minmax(0, 1fr)); }
+}
+@media (min-width: 640px) { /* sm breakpoint */
+    .sm\\:grid-cols-2 { grid-template-columns: repeat(2, minmax(0, 1fr)); }
+}
+@media (min-width: 768px) { /* md breakpoint */
+    .md\\:grid-cols-2 { grid-template-columns: repeat(2, minmax(0, 1fr)); }
+}
+@media (min-width: 1280px) { /* xl breakpoint */
+    .xl\\:grid-cols-3 { grid-template-columns: repeat(3, minmax(0, 1fr)); }
+}
+"""
+
+STYLESHEET = StaticAsset("store.css", STORE_CSS, "text/css; charset=utf-8",
+                         last_modified=os.path.getmtime(__file__))
+
+# URL path -> StaticAsset
+STATIC_ASSETS = {STYLESHEET.url: STYLESHEET}
+STATIC_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# --- Catalog Listings ---
+class Listing(collections.namedtuple('Listing', 'category page page_size min_price max_price')):
+    """
+    One page of the catalog as requested in the query string.
+    Being hashable, it is also the fragment cache key for that page.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_query(cls, query_params):
+        """Builds a Listing from parsed query parameters, ignoring malformed numbers."""
+        def number(name, convert, default):
+            try:
+                return convert(query_params[name][0])
+            except (KeyError, ValueError):
+                return default
+
+        return cls(
+            category=query_params.get('category', ['All'])[0],
+            page=max(number('page', int, 1), 1),
+            page_size=min(max(number('page_size', int, PAGE_SIZE), 1), MAX_PAGE_SIZE),
+            min_price=number('min_price', float, None),
+            max_price=number('max_price', float, None),
+        )
+
+    def query_string(self, **changes):
+        """URL-encoded query string for this listing (with optional changes), omitting defaults."""
+        listing = self._replace(**changes)
+        params = [('category', listing.category)]
+        if listing.page != 1:
+            params.append(('page', listing.page))
+        if listing.page_size != PAGE_SIZE:
+            params.append(('page_size', listing.page_size))
+        if listing.min_price is not None:
+            params.append(('min_price', listing.min_price))
+        if listing.max_price is not None:
+            params.append(('max_price', listing.max_price))
+        return urllib.parse.urlencode(params, quote_via=urllib.parse.quote)
+
+    def products(self, catalog):
+        """Returns (the products on this page, the number of matching products)."""
+        start = (self.page - 1) * self.page_size
+        if self.min_price is None and self.max_price is None:
+            matches = catalog.in_category(self.category)
+            return matches[start:start + self.page_size], len(matches)
+        by_price, lo, hi = catalog.price_range_bounds(self.min_price, self.max_price, self.category)
+        start += lo
+        return by_price[start:min(start + self.page_size, hi)], hi - lo
+
+
+# --- Fragment Cache ---
+class FragmentCache:
+    """
+    Thread-safe LRU cache of pre-encoded HTML fragments, with hit/miss counters.
+    Keys must include the catalog version so a new catalog never sees stale entries.
+    """
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Returns the cached value for key, or None on a miss."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_render(self, key, render):
+        """Returns the cached value for key, calling render() to build it on a miss."""
+        value = self.get(key)
+        if value is None:
+            # Rendered outside the lock; two threads missing the same key just both render it
+            value = render()
+            self.put(key, value)
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+# (catalog version, Listing) -> (category_items, product_cards, pagination)
+LISTING_CACHE = FragmentCache(LISTING_CACHE_SIZE)
+
+# (catalog version, Listing or product id) -> serialized JSON response body
+API_CACHE = FragmentCache(API_CACHE_SIZE)
+
+# --- Metrics ---
+class Histogram:
+    """Counts observations into fixed buckets (Prometheus style, with a running sum)."""
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1) # Last slot is +Inf
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def exposition(self, name, labels):
+        """Yields Prometheus text lines with cumulative bucket counts."""
+        cumulative = 0
+        for bound, count in zip(self.bounds + (float('inf'),), self.counts):
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            yield f'{name}_bucket{{{labels},le="{le}"}} {cumulative}'
+        yield f'{name}_sum{{{labels}}} {self.sum}'
+        yield f'{name}_count{{{labels}}} {cumulative}'
+
+
+class Metrics:
+    """
+    Request metrics for /metrics: per-route latency histograms (overall and per
+    phase), request and byte counters, and an in-flight gauge.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.durations = {} # route -> Histogram
+        self.phases = {} # (route, phase) -> Histogram
+        self.requests = {} # (route, status) -> count
+        self.bytes_sent = {} # route -> bytes
+
+    def request_started(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def request_finished(self, route, status, duration, phase_times, bytes_sent):
+        with self._lock:
+            self.in_flight -= 1
+            self.durations.setdefault(route, Histogram()).observe(duration)
+            for phase, seconds in phase_times.items():
+                self.phases.setdefault((route, phase), Histogram()).observe(seconds)
+            key = (route, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.bytes_sent[route] = self.bytes_sent.get(route, 0) + bytes_sent
+
+    def exposition(self):
+        """Renders all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            lines = [
+                "# HELP store_requests_in_flight Requests currently being handled.",
+                "# TYPE store_requests_in_flight gauge",
+                f"store_requests_in_flight {self.in_flight}",
+                "# HELP store_requests_total Requests handled, by route and status code.",
+                "# TYPE store_requests_total counter",
+            ]
+            lines += [f'store_requests_total{{route="{route}",status="{status}"}} {count}'
+                      for (route, status), count in sorted(self.requests.items(), key=str)]
+            lines += [
+                "# HELP store_response_bytes_total Bytes written to clients (headers and body), by route.",
+                "# TYPE store_response_bytes_total counter",
+            ]
+            lines += [f'store_response_bytes_total{{route="{route}"}} {count}'
+                      for route, count in sorted(self.bytes_sent.items())]
+            lines += [
+                "# HELP store_request_duration_seconds Time to handle a request, by route.",
+                "# TYPE store_request_duration_seconds histogram",
+            ]
+            for route, histogram in sorted(self.durations.items()):
+                lines += histogram.exposition("store_request_duration_seconds", f'route="{route}"')
+            lines += [
+                "# HELP store_request_phase_seconds Time spent per phase of a request "
+                "(routing, cart, catalog, render, write), by route.",
+                "# TYPE store_request_phase_seconds histogram",
+            ]
+            for (route, phase), histogram in sorted(self.phases.items()):
+                lines += histogram.exposition("store_request_phase_seconds", f'route="{route}",phase="{phase}"')
+
+        for name, help_text, kind in (
+                ("hits", "Fragment cache hits.", "counter"),
+                ("misses", "Fragment cache misses.", "counter"),
+                ("evictions", "Fragment cache evictions.", "counter"),
+                ("entries", "Entries currently held by a fragment cache.", "gauge")):
+            metric = f"store_cache_{name}_total" if kind == "counter" else f"store_cache_{name}"
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}"]
+            for cache_name, cache in (("listing", LISTING_CACHE), ("api", API_CACHE)):
+                lines.append(f'{metric}{{cache="{cache_name}"}} {cache.stats()[name]}')
+        lines += [
+            "# HELP store_cart_sessions Carts currently held in memory.",
+            "# TYPE store_cart_sessions gauge",
+            f"store_cart_sessions {len(CARTS)}",
+        ]
+        return ("\n".join(lines) + "\n").encode('utf-8')
+
+
+METRICS = Metrics()
+
+def _route_label(path):
+    """Maps a request path to a low-cardinality route label for metrics."""
+    if path in ('/', '/add_to_cart', '/remove_from_cart', '/cache_stats', '/metrics', '/api/products', '/api/cart'):
+        return path
+    if path.startswith('/static/'):
+        return '/static'
+    if path.startswith('/api/products/'):
+        return '/api/products/:id'
+    return 'other'
+
+
+# --- Access Log ---
+# Request threads only put log records on a queue; one listener thread writes
+# them to stderr, so a slow terminal or pipe never stalls a request. The servers
+# run the listener while they are open; the queue is bounded so records cannot
+# pile up without one.
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Drops records instead of blocking the request when the queue is full."""
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+ACCESS_LOG = logging.getLogger("webApplication.access")
+ACCESS_LOG.setLevel(logging.INFO)
+ACCESS_LOG.propagate = False
+_ACCESS_LOG_QUEUE = queue.Queue(ACCESS_LOG_QUEUE_SIZE)
+ACCESS_LOG.addHandler(_DroppingQueueHandler(_ACCESS_LOG_QUEUE))
+ACCESS_LOG_LISTENER = logging.handlers.QueueListener(_ACCESS_LOG_QUEUE, logging.StreamHandler(sys.stderr))
+_access_log_users = 0
+_access_log_lock = threading.Lock()
+
+def _open_access_log():
+    """Starts the listener for the first open server."""
+    global _access_log_users
+    with _access_log_lock:
+        if _access_log_users == 0:
+            ACCESS_LOG_LISTENER.start()
+        _access_log_users += 1
+
+def _close_access_log():
+    """Stops the listener, writing out queued lines, once the last server closes."""
+    global _access_log_users
+    with _access_log_lock:
+        _access_log_users -= 1
+        if _access_log_users == 0:
+            ACCESS_LOG_LISTENER.stop()
+
+
+# --- Page Templates ---
+class PageTemplate:
+    """
+    A page template compiled once at import time.
+    The source is split at {{slot}} markers and the static text between them is
+    encoded to UTF-8 up front, so rendering only joins byte strings.
+    """
+    _SLOT_PATTERN = re.compile(r"\{\{(\w+)\}\}")
+
+    def __init__(self, source, **constants):
+        # Slots whose values are known at import time are filled in before compiling
+        for name, value in constants.items():
+            source = source.replace("{{%s}}" % name, value)
+        parts = self._SLOT_PATTERN.split(source)
+        self.static_parts = [part.encode('utf-8') for part in parts[0::2]]
+        self.slot_names = parts[1::2]
+
+    def render(self, **fragments):
         """
-        Generates the full HTML page content.
-        This replaces the Jinja2 templating from the Flask example.
+        Joins the static parts with the given pre-encoded fragments.
+        A fragment is bytes, or an iterable of bytes that is consumed here.
         """
-        # --- Start HTML Structure ---
-        html = f"""
-<!DOCTYPE html>
+        output = [self.static_parts[0]]
+        for name, static_part in zip(self.slot_names, self.static_parts[1:]):
+            fragment = fragments[name]
+            if isinstance(fragment, bytes):
+                output.append(fragment)
+            else:
+                output.extend(fragment)
+            output.append(static_part)
+        return b"".join(output)
+
+    def stream(self, **fragments):
+        """Yields the page piece by piece, consuming iterable fragments lazily."""
+        yield self.static_parts[0]
+        for name, static_part in zip(self.slot_names, self.static_parts[1:]):
+            fragment = fragments[name]
+            if isinstance(fragment, bytes):
+                yield fragment
+            else:
+                yield from fragment
+            yield static_part
+
+
+PAGE_TEMPLATE = PageTemplate("""<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>My Python Online Store</title>
-    <style>
-        /* Basic Tailwind-like classes for styling */
-        body {{
-            font-family: 'Inter', sans-serif;
-            margin: 0;
-            background-color: #f3f4f6; /* gray-100 */
-            color: #1f2937; /* gray-900 */
-        }}
-        .container {{
-            max-width: 1200px;
-            margin: 0 auto;
-            padding: 1.5rem; /* p-6 */
-        }}
-        .header {{
-            background-color: #4f46e5; /* indigo-700 */
-            color: white;
-            padding: 1rem; /* p-4 */
-            box-shadow: 0 2px 4px rgba(0, 0, 0, 0.1); /* shadow-md */
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-        }}
-        .header h1 {{
-            font-size: 1.5rem; /* text-2xl */
-            font-weight: bold;
-        }}
-        .relative {{
-            position: relative;
-        }}
-        .absolute {{
-            position: absolute;
-        }}
-        .-top-2 {{ top: -0.5rem; }}
-        .-right-2 {{ right: -0.5rem; }}
-        .bg-red-500 {{ background-color: #ef4444; }}
-        .text-white {{ color: white; }}
-        .text-xs {{ font-size: 0.75rem; }}
-        .font-bold {{ font-weight: bold; }}
-        .rounded-full {{ border-radius: 9999px; }}
-        .h-5 {{ height: 1.25rem; }}
-        .w-5 {{ width: 1.25rem; }}
-        .flex {{ display: flex; }}
-        .items-center {{ align-items: center; }}
-        .justify-center {{ justify-content: center; }}
-        .grid {{ display: grid; }}
-        .grid-cols-1 {{ grid-template-columns: repeat(1, minmax(0, 1fr)); }}
-        .lg\\:grid-cols-4 {{ /* Escaped colon for CSS class name */
-            grid-template-columns: repeat(4, minmax(0, 1fr));
-        }}
-        .gap-6 {{ gap: 1.5rem; }}
-        .bg-white {{ background-color: white; }}
-        .rounded-lg {{ border-radius: 0.5rem; }}
-        .shadow-md {{ box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.1), 0 2px 4px -1px rgba(0, 0, 0, 0.06); }}
-        .p-6 {{ padding: 1.5rem; }}
-        .h-fit {{ height: fit-content; }}
-        .sticky {{ position: sticky; }}
-        .top-4 {{ top: 1rem; }}
-        .text-xl {{ font-size: 1.25rem; }}
-        .mb-4 {{ margin-bottom: 1rem; }}
-        .text-gray-800 {{ color: #1f2937; }}
-        .space-y-2 > *:not([hidden]) ~ *:not([hidden]) {{ margin-top: 0.5rem; }}
-        .block {{ display: block; }}
-        .w-full {{ width: 100%; }}
-        .text-left {{ text-align: left; }}
-        .px-4 {{ padding-left: 1rem; padding-right: 1rem; }}
-        .py-2 {{ padding-top: 0.5rem; padding-bottom: 0.5rem; }}
-        .rounded-md {{ border-radius: 0.375rem; }}
-        .transition-colors {{ transition-property: background-color, border-color, color, fill, stroke; transition-timing-function: cubic-bezier(0.4, 0, 0.2, 1); transition-duration: 150ms; }}
-        .duration-200 {{ transition-duration: 200ms; }}
-        .bg-indigo-100 {{ background-color: #e0e7ff; }}
-        .text-indigo-700 {{ color: #4338ca; }}
-        .font-semibold {{ font-weight: 600; }}
-        .text-gray-700 {{ color: #374151; }}
-        .hover\\:bg-gray-100:hover {{ background-color: #f3f4f6; }}
-        .text-2xl {{ font-size: 1.5rem; }}
-        .mb-6 {{ margin-bottom: 1.5rem; }}
-        .sm\\:grid-cols-2 {{
-            grid-template-columns: repeat(2, minmax(0, 1fr));
-        }}
-        .md\\:grid-cols-2 {{
-            grid-template-columns: repeat(2, minmax(0, 1fr));
-        }}
-        .lg\\:grid-cols-2 {{
-            grid-template-columns: repeat(2, minmax(0, 1fr));
-        }}
-        .xl\\:grid-cols-3 {{
-            grid-template-columns: repeat(3, minmax(0, 1fr));
-        }}
-        .p-4 {{ padding: 1rem; }}
-        .flex-col {{ flex-direction: column; }}
-        .items-center {{ align-items: center; }}
-        .justify-between {{ justify-content: space-between; }}
-        .transform {{ transform: var(--tw-transform); }}
-        .transition-transform {{ transition-property: transform; transition-timing-function: cubic-bezier(0.4, 0, 0.2, 1); transition-duration: 150ms; }}
-        .hover\\:scale-105:hover {{ transform: scale(1.05); }}
-        .w-32 {{ width: 8rem; }}
-        .h-32 {{ height: 8rem; }}
-        .object-cover {{ object-fit: cover; }}
-        .mb-4 {{ margin-bottom: 1rem; }}
-        .text-lg {{ font-size: 1.125rem; }}
-        .text-center {{ text-align: center; }}
-        .text-sm {{ font-size: 0.875rem; }}
-        .text-gray-600 {{ color: #4b5563; }}
-        .mb-2 {{ margin-bottom: 0.5rem; }}
-        .text-indigo-600 {{ color: #4f46e5; }}
-        .bg-indigo-500 {{ background-color: #6366f1; }}
-        .hover\\:bg-indigo-600:hover {{ background-color: #4f46e5; }}
-        .focus\\:outline-none:focus {{ outline: 2px solid transparent; outline-offset: 2px; }}
-        .focus\\:ring-2:focus {{ box-shadow: 0 0 0 2px var(--tw-ring-color); }}
-        .focus\\:ring-indigo-500:focus {{ --tw-ring-color: #6366f1; }}
-        .focus\\:ring-opacity-50:focus {{ --tw-ring-opacity: 0.5; }}
-        .bg-gray-50 {{ background-color: #f9fafb; }}
-        .p-3 {{ padding: 0.75rem; }}
-        .shadow-sm {{ box-shadow: 0 1px 2px 0 rgba(0, 0, 0, 0.05); }}
-        .mb-2 {{ margin-bottom: 0.5rem; }}
-        .w-12 {{ width: 3rem; }}
-        .h-12 {{ height: 3rem; }}
-        .mr-3 {{ margin-right: 0.75rem; }}
-        .font-medium {{ font-weight: 500; }}
-        .bg-red-500 {{ background-color: #ef4444; }}
-        .px-3 {{ padding-left: 0.75rem; padding-right: 0.75rem; }}
-        .py-1 {{ padding-top: 0.25rem; padding-bottom: 0.25rem; }}
-        .hover\\:bg-red-600:hover {{ background-color: #dc2626; }}
-        .text-gray-500 {{ color: #6b7280; }}
-        .space-y-3 > *:not([hidden]) ~ *:not([hidden]) {{ margin-top: 0.75rem; }}
-        .max-h-80 {{ max-height: 20rem; }}
-        .overflow-y-auto {{ overflow-y: auto; }}
-        .pr-2 {{ padding-right: 0.5rem; }}
-        .border-t {{ border-top-width: 1px; border-color: #e5e7eb; /* gray-200 */ }}
-        .pt-4 {{ padding-top: 1rem; }}
-        .mt-4 {{ margin-top: 1rem; }}
-        .bg-green-500 {{ background-color: #22c55e; }}
-        .hover\\:bg-green-600:hover {{ background-color: #16a34a; }}
-        .focus\\:ring-green-500:focus {{ --tw-ring-color: #22c55e; }}
-
-        /* Custom scrollbar for cart */
-        .overflow-y-auto::-webkit-scrollbar {{
-            width: 8px;
-        }}
-        .overflow-y-auto::-webkit-scrollbar-track {{
-            background: #f1f1f1;
-            border-radius: 10px;
-        }}
-        .overflow-y-auto::-webkit-scrollbar-thumb {{
-            background: #888;
-            border-radius: 10px;
-        }}
-        .overflow-y-auto::-webkit-scrollbar-thumb:hover {{
-            background: #555;
-        }}
-
-        /* Responsive adjustments */
-        @media (min-width: 1024px) {{ /* lg breakpoint */
-            .lg\\:col-span-1 {{ grid-column: span 1 / span 1; }}
-            .lg\\:col-span-2 {{ grid-column: span 2 / span 2; }}
-            .lg\\:grid-cols-2 {{ grid-template-columns: repeat(2, minmax(0, 1fr)); }}
-        }}
-        @media (min-width: 640px) {{ /* sm breakpoint */
-            .sm\\:grid-cols-2 {{ grid-template-columns: repeat(2, minmax(0, 1fr)); }}
-        }}
-        @media (min-width: 768px) {{ /* md breakpoint */
-            .md\\:grid-cols-2 {{ grid-template-columns: repeat(2, minmax(0, 1fr)); }}
-        }}
-        @media (min-width: 1280px) {{ /* xl breakpoint */
-            .xl\\:grid-cols-3 {{ grid-template-columns: repeat(3, minmax(0, 1fr)); }}
-        }}
-    </style>
+    <link rel="stylesheet" href="{{stylesheet_url}}">
 </head>
 <body>
     <div class="min-h-screen bg-gray-100 font-sans text-gray-900">
@@ -303,11 +841,7 @@ class MyHandler(http.server.SimpleHTTPRequestHandler):
                     <svg xmlns="http://www.w3.org/2000/svg" class="h-6 w-6 cursor-pointer" fill="none" viewBox="0 0 24 24" stroke="currentColor" stroke-width="2">
                         <path stroke-linecap="round" stroke-linejoin="round" d="M3 3h2l.4 2M7 13h10l4-8H5.4M7 13L5.4 5M7 13l-2.293 2.293c-.63.63-.184 1.707.707 1.707H17m0 0a2 2 0 100 4 2 2 0 000-4zm-8 2a2 2 0 11-4 0 2 2 0 014 0z" />
                     </svg>
-                    {len(cart) > 0 and f"""
-                        <span class="absolute -top-2 -right-2 bg-red-500 text-white text-xs font-bold rounded-full h-5 w-5 flex items-center justify-center">
-                            {len(cart)}
-                        </span>
-                    """ or ""}
+                    {{cart_badge}}
                 </div>
             </div>
         </header>
@@ -317,15 +851,7 @@ class MyHandler(http.server.SimpleHTTPRequestHandler):
             <aside class="lg:col-span-1 bg-white rounded-lg shadow-md p-6 h-fit sticky top-4">
                 <h2 class="text-xl font-bold mb-4 text-gray-800">Categories</h2>
                 <ul class="space-y-2">
-                    {"".join([f"""
-                    <li>
-                        <a href="/?category={cat}"
-                           class="block w-full text-left px-4 py-2 rounded-md transition-colors duration-200
-                                  { 'bg-indigo-100 text-indigo-700 font-semibold' if selected_category == cat else 'text-gray-700 hover:bg-gray-100' }">
-                            {cat}
-                        </a>
-                    </li>
-                    """ for cat in categories])}
+                    {{category_items}}
                 </ul>
             </aside>
 
@@ -333,20 +859,9 @@ class MyHandler(http.server.SimpleHTTPRequestHandler):
             <main class="lg:col-span-2">
                 <h2 class="text-2xl font-bold mb-6 text-gray-800">Products</h2>
                 <div class="grid grid-cols-1 sm:grid-cols-2 md:grid-cols-2 lg:grid-cols-2 xl:grid-cols-3 gap-6">
-                    {"".join([f"""
-                    <div class="bg-white rounded-lg shadow-md p-4 flex flex-col items-center justify-between transform transition-transform duration-200 hover:scale-105">
-                        <img src="{product['image']}" alt="{product['name']}" class="w-32 h-32 object-cover rounded-md mb-4"
-                             onerror="this.onerror=null;this.src='https://placehold.co/150x150/F0F8FF/000000?text=No+Image';">
-                        <h3 class="text-lg font-semibold text-gray-800 text-center">{product['name']}</h3>
-                        <p class="text-sm text-gray-600 mb-2">{product['category']}</p>
-                        <p class="text-xl font-bold text-indigo-600 mb-4">${product['price']:.2f}</p>
-                        <a href="/add_to_cart?product_id={product['id']}&category={selected_category}"
-                           class="bg-indigo-500 text-white px-4 py-2 rounded-full hover:bg-indigo-600 transition-colors duration-200 focus:outline-none focus:ring-2 focus:ring-indigo-500 focus:ring-opacity-50">
-                            Add to Cart
-                        </a>
-                    </div>
-                    """ for product in products])}
+                    {{product_cards}}
                 </div>
+                {{pagination}}
             </main>
 
             <!-- Shopping Cart Section -->
@@ -358,13 +873,160 @@ class MyHandler(http.server.SimpleHTTPRequestHandler):
                         <path stroke-linecap="round" stroke-linejoin="round" d="M3 3h2l.4 2M7 13h10l4-8H5.4M7 13L5.4 5M7 13l-2.293 2.293c-.63.63-.184 1.707.707 1.707H17m0 0a2 2 0 100 4 2 2 0 000-4zm-8 2a2 2 0 11-4 0 2 2 0 014 0z" />
                     </svg>
                 </h2>
-                {f"""
-                { 'Your cart is empty.' if len(cart) == 0 else '' }
-                """}
-                {f"""
-                { "" if len(cart) == 0 else f'''
-                    <div class="space-y-3 mb-4 max-h-80 overflow-y-auto pr-2">
-                        {"".join([f"""
+                {{cart_panel}}
+            </aside>
+        </div>
+    </div>
+</body>
+</html>""", stylesheet_url=STYLESHEET.url)
+
+CART_EMPTY_HTML = b"""
+                Your cart is empty.
+"""
+
+CART_PANEL_TEMPLATE = PageTemplate("""
+                    <div class="space-y-3 mb-4 max-h-80 overflow-y-auto pr-2">{{cart_items}}
+                    </div>
+                    <div class="border-t pt-4 mt-4">
+                        <div class="flex justify-between items-center font-bold text-lg text-gray-800">
+                            <span>Total:</span>
+                            <span>${{cart_total}}</span>
+                        </div>
+                        <button class="mt-4 w-full bg-green-500 text-white px-4 py-2 rounded-full hover:bg-green-600 transition-colors duration-200 focus:outline-none focus:ring-2 focus:ring-green-500 focus:ring-opacity-50">
+                            Proceed to Checkout
+                        </button>
+                    </div>
+""")
+
+# Repeated fragments are plain f-string functions: Python compiles them once,
+# and they run far faster than str.format() on kilobyte-sized templates.
+@functools.lru_cache(maxsize=1024)
+def _query_value(text):
+    """URL-encodes a query string value (categories repeat, so results are cached)."""
+    return urllib.parse.quote(text, safe='')
+
+@functools.lru_cache(maxsize=1024)
+def _listing_query(listing):
+    """A Listing's query string, escaped for use in href attributes (cached, listings repeat)."""
+    return listing.query_string().replace('&', '&amp;')
+
+def _render_cart_badge(count):
+    return f"""
+                        <span class="absolute -top-2 -right-2 bg-red-500 text-white text-xs font-bold rounded-full h-5 w-5 flex items-center justify-center">
+                            {count}
+                        </span>
+"""
+
+def _render_category_item(cat, selected_category):
+    css_class = 'bg-indigo-100 text-indigo-700 font-semibold' if selected_category == cat else 'text-gray-700 hover:bg-gray-100'
+    return f"""
+                    <li>
+                        <a href="/?category={_query_value(cat)}"
+                           class="block w-full text-left px-4 py-2 rounded-md transition-colors duration-200
+                                  {css_class}">
+                            {cat}
+                        </a>
+                    </li>
+"""
+
+def _render_product_card(product, query):
+    return f"""
+                    <div class="bg-white rounded-lg shadow-md p-4 flex flex-col items-center justify-between transform transition-transform duration-200 hover:scale-105">
+                        <img src="{product['image']}" alt="{product['name']}" class="w-32 h-32 object-cover rounded-md mb-4"
+                             onerror="this.onerror=null;this.src='https://placehold.co/150x150/F0F8FF/000000?text=No+Image';">
+                        <h3 class="text-lg font-semibold text-gray-800 text-center">{product['name']}</h3>
+                        <p class="text-sm text-gray-600 mb-2">{product['category']}</p>
+                        <p class="text-xl font-bold text-indigo-600 mb-4">${product['price']:.2f}</p>
+                        <a href="/add_to_cart?product_id={product['id']}&amp;{query}"
+                           class="bg-indigo-500 text-white px-4 py-2 rounded-full hover:bg-indigo-600 transition-colors duration-200 focus:outline-none focus:ring-2 focus:ring-indigo-500 focus:ring-opacity-50">
+                            Add to Cart
+                        </a>
+                    </div>
+"""
+
+# Compiled product cards are kept per catalog (Catalog.card_templates). Only the
+# listing query in the "Add to Cart" link changes between requests, so each card
+# is rendered once around a query marker and kept as the pre-encoded text before
+# and after it. The query is the last value in the card, so splitting at the last
+# marker is right even if catalog data contains the marker text.
+_CARD_QUERY_MARKER = "\0query\0"
+
+def _product_card_template(product):
+    """Returns the (head, tail) bytes of a product card around its listing query."""
+    templates = CATALOG.card_templates
+    entry = templates.get(product['id'])
+    if entry is None or entry[0] is not product: # Recompile if the product record was replaced
+        head, _, tail = _render_product_card(product, _CARD_QUERY_MARKER).rpartition(_CARD_QUERY_MARKER)
+        entry = (product, (head.encode('utf-8'), tail.encode('utf-8')))
+        templates[product['id']] = entry
+    return entry[1]
+
+def _render_product_cards(products, query):
+    """Renders the product grid as bytes by splicing the encoded query into each compiled card."""
+    output = []
+    for product in products:
+        head, tail = _product_card_template(product)
+        output += (head, query, tail)
+    return b"".join(output)
+
+class _FlushMarker(bytes):
+    """Empty bytes with an identity of its own: vanishes when joined, recognisable when streamed."""
+
+# Yielded by a streamed fragment to ask the writer to send what it has buffered
+FLUSH = _FlushMarker()
+
+def _iter_product_cards(products, query):
+    """Yields the product grid card by card, flushing first and then every STREAM_BATCH cards."""
+    yield FLUSH # Let the page head go out before the first card is rendered
+    for count, product in enumerate(products, 1):
+        head, tail = _product_card_template(product)
+        yield head
+        yield query
+        yield tail
+        if count % STREAM_BATCH == 0:
+            yield FLUSH
+
+def _render_pagination(listing, total):
+    """Renders the previous/next links for a listing, or nothing if it fits on one page."""
+    pages = max(1, -(-total // listing.page_size))
+    if pages == 1 and listing.page == 1:
+        return b""
+    link_class = "bg-indigo-500 text-white px-4 py-2 rounded-full hover:bg-indigo-600 transition-colors duration-200"
+    previous_link = next_link = "<span></span>"
+    if listing.page > 1:
+        query = listing.query_string(page=min(listing.page - 1, pages)).replace('&', '&amp;')
+        previous_link = f'<a href="/?{query}" class="{link_class}">&larr; Previous</a>'
+    if listing.page < pages:
+        query = listing.query_string(page=listing.page + 1).replace('&', '&amp;')
+        next_link = f'<a href="/?{query}" class="{link_class}">Next &rarr;</a>'
+    return f"""
+                <nav class="flex justify-between items-center mt-4">
+                    {previous_link}
+                    <span class="text-sm text-gray-600">Page {listing.page} of {pages} ({total} products)</span>
+                    {next_link}
+                </nav>
+""".encode('utf-8')
+
+def _render_category_items(categories, selected_category):
+    return "".join([_render_category_item(cat, selected_category) for cat in categories]).encode('utf-8')
+
+def _render_listing(products, total, categories, listing):
+    """Renders the cart-independent fragments of a page: (category_items, product_cards, pagination) as bytes."""
+    query = _listing_query(listing).encode('utf-8')
+    return (_render_category_items(categories, listing.category),
+            _render_product_cards(products, query),
+            _render_pagination(listing, total))
+
+def _stream_into_cache(key, category_items, product_cards, pagination):
+    """Passes streamed product cards through, caching the listing once the grid is complete."""
+    rendered = []
+    for piece in product_cards:
+        rendered.append(piece)
+        yield piece
+    LISTING_CACHE.put(key, (category_items, b"".join(rendered), pagination))
+
+def _render_cart_item(item, query):
+    return f"""
                         <div class="flex items-center justify-between bg-gray-50 p-3 rounded-md shadow-sm mb-2">
                             <div class="flex items-center">
                                 <img src="{item['image']}" alt="{item['name']}" class="w-12 h-12 object-cover rounded-md mr-3"
@@ -376,40 +1038,782 @@ class MyHandler(http.server.SimpleHTTPRequestHandler):
                             </div>
                             <div class="flex items-center">
                                 <p class="font-semibold text-indigo-600 mr-3">${item['price'] * item['quantity']:.2f}</p>
-                                <a href="/remove_from_cart?product_id={item['id']}&category={selected_category}"
+                                <a href="/remove_from_cart?product_id={item['id']}&amp;{query}"
                                    class="bg-red-500 text-white px-3 py-1 rounded-full text-sm hover:bg-red-600 transition-colors duration-200 focus:outline-none focus:ring-2 focus:ring-red-500 focus:ring-opacity-50">
                                     Remove
                                 </a>
                             </div>
                         </div>
-                        """ for item in cart])}
-                    </div>
-                    <div class="border-t pt-4 mt-4">
-                        <div class="flex justify-between items-center font-bold text-lg text-gray-800">
-                            <span>Total:</span>
-                            <span>${cart_total:.2f}</span>
-                        </div>
-                        <button class="mt-4 w-full bg-green-500 text-white px-4 py-2 rounded-full hover:bg-green-600 transition-colors duration-200 focus:outline-none focus:ring-2 focus:ring-green-500 focus:ring-opacity-50">
-                            Proceed to Checkout
-                        </button>
-                    </div>
-                ''' }
-                """}
-            </aside>
-        </div>
-    </div>
-</body>
-</html>
 """
-        return html
+
+class MyHandler(http.server.SimpleHTTPRequestHandler):
+    """
+    Custom HTTP request handler to serve the product display web application.
+    """
+    # HTTP/1.1 lets browsers reuse one connection for the page and its redirects.
+    # Every response must therefore carry a Content-Length.
+    protocol_version = "HTTP/1.1"
+    timeout = KEEPALIVE_TIMEOUT
+    # Headers and body go out in separate writes; with Nagle's algorithm on, the
+    # body waits for the client's delayed ACK (~40 ms) on kept-alive connections
+    disable_nagle_algorithm = True
+
+    def handle(self):
+        """
+        Serves the requests that have arrived on the connection. On a server that watches
+        idle connections (ThreadPoolHTTPServer), a kept-alive connection with nothing more
+        to read is marked idle and handed back, instead of holding the worker until the
+        next request or the keep-alive timeout.
+        """
+        self.idle = False
+        if not getattr(self.server, 'parks_idle_connections', False):
+            super().handle()
+            return
+        self.close_connection = True
+        self.handle_one_request()
+        while not self.close_connection:
+            if not self._input_pending():
+                self.idle = True
+                return
+            self.handle_one_request() # Pipelined request
+
+    def _input_pending(self):
+        """Checks, without blocking, whether more request bytes are buffered or waiting on the socket."""
+        self.connection.settimeout(0)
+        try:
+            return bool(self.rfile.peek(1))
+        except OSError:
+            return False
+        finally:
+            self.connection.settimeout(self.timeout)
+
+    def handle_one_request(self):
+        # One handler instance serves every request that arrives together on a connection
+        self._new_session_id = None
+        self._reset_request_metrics()
+        super().handle_one_request()
+
+    def log_message(self, format, *args):
+        """Sends access log lines through the queued ACCESS_LOG instead of writing stderr directly."""
+        ACCESS_LOG.info("%s - - [%s] %s", self.address_string(), self.log_date_time_string(), format % args)
+
+    # --- Request Metrics ---
+    def _reset_request_metrics(self):
+        self._status = None
+        self._bytes_sent = 0
+        self._phase_times = collections.defaultdict(float)
+        self._phase = 'routing'
+        self._phase_started = time.perf_counter()
+
+    @contextlib.contextmanager
+    def _request_metrics(self):
+        """Times the request and its phases and reports them to METRICS when it ends."""
+        route = _route_label(urllib.parse.urlparse(self.path).path)
+        self._reset_request_metrics()
+        started = self._phase_started
+        METRICS.request_started()
+        try:
+            yield
+        except BaseException:
+            if self._status is None:
+                self._status = 500 # Failed before a response was started
+            raise
+        finally:
+            self._enter_phase(None)
+            METRICS.request_finished(route, self._status, time.perf_counter() - started,
+                                     self._phase_times, self._bytes_sent)
+
+    def _enter_phase(self, phase):
+        """Charges the time since the last switch to the current phase, switches to phase and returns the old one."""
+        now = time.perf_counter()
+        previous = self._phase
+        if previous is not None:
+            self._phase_times[previous] += now - self._phase_started
+        self._phase, self._phase_started = phase, now
+        return previous
+
+    def _write(self, data):
+        """Writes response bytes to the socket, timed as the 'write' phase."""
+        previous = self._enter_phase('write')
+        self.wfile.write(data)
+        self._bytes_sent += len(data)
+        self._enter_phase(previous)
+
+    def send_response(self, code, message=None):
+        self._status = code
+        super().send_response(code, message)
+
+    def flush_headers(self):
+        if hasattr(self, '_headers_buffer'):
+            self._bytes_sent += sum(map(len, self._headers_buffer))
+        previous = self._enter_phase('write')
+        super().flush_headers()
+        self._enter_phase(previous)
+
+    def end_headers(self):
+        """Adds any new session cookie, and asks the client to close when the connection cannot be kept alive."""
+        if self._new_session_id is not None:
+            self.send_header('Set-Cookie', f"{SESSION_COOKIE}={self._new_session_id}; Path=/; HttpOnly; SameSite=Lax")
+        if (self.close_connection or not getattr(self.server, 'keep_alive', False)
+                or getattr(self.server, 'shutting_down', False)):
+            self.send_header('Connection', 'close')
+        super().end_headers()
+
+    def _get_cart(self, create=False):
+        """
+        Returns the visitor's cart from the session cookie.
+        Browsing alone never starts a session; create=True does (used when adding to the cart).
+        """
+        cookie = http.cookies.SimpleCookie()
+        try:
+            cookie.load(self.headers.get('Cookie', ''))
+        except http.cookies.CookieError:
+            pass
+        morsel = cookie.get(SESSION_COOKIE)
+        cart = CARTS.get(morsel.value) if morsel else None
+        if cart is None and create:
+            self._new_session_id, cart = CARTS.create()
+        return cart
+
+    def _send_redirect(self, location):
+        """Sends an empty 302 response pointing at location."""
+        self.send_response(302) # Found (redirect)
+        self.send_header('Location', location)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def _send_static_asset(self, asset):
+        """Serves a StaticAsset with caching headers, answering 304 when the client copy is fresh."""
+        encoding = asset.choose_encoding(self.headers.get('Accept-Encoding'))
+        body, etag = asset.variants[encoding]
+        fresh = asset.is_fresh(self.headers.get('If-None-Match'), self.headers.get('If-Modified-Since'))
+
+        self.send_response(304 if fresh else 200)
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', asset.last_modified)
+        self.send_header('Cache-Control', STATIC_CACHE_CONTROL)
+        self.send_header('Vary', 'Accept-Encoding')
+        if fresh:
+            self.end_headers()
+            return
+        self.send_header('Content-Type', asset.content_type)
+        if encoding != 'identity':
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self._write(body)
+
+    def do_GET(self):
+        with self._request_metrics():
+            self._handle_get()
+
+    def _handle_get(self):
+        """
+        Handles GET requests for the web application.
+        Parses URLs to display products, add to cart, or remove from cart.
+        """
+        parsed_url = urllib.parse.urlparse(self.path)
+        path = parsed_url.path
+        query_params = urllib.parse.parse_qs(parsed_url.query)
+
+        if path in STATIC_ASSETS:
+            self._send_static_asset(STATIC_ASSETS[path])
+            return
+
+        if path.startswith('/api/'):
+            self._handle_api('GET', path, query_params)
+            return
+
+        listing = Listing.from_query(query_params)
+        redirect_path = '/' # Default redirect path
+
+        if path == '/add_to_cart':
+            product_id = int(query_params.get('product_id', [0])[0])
+            self._enter_phase('catalog')
+            product_to_add = CATALOG.get(product_id)
+            if product_to_add:
+                self._enter_phase('cart')
+                self._get_cart(create=True).add(product_to_add)
+            # Redirect back to the product list, preserving the category and page
+            redirect_path = f"/?{listing.query_string()}"
+            self._send_redirect(redirect_path)
+            return
+
+        elif path == '/remove_from_cart':
+            product_id = int(query_params.get('product_id', [0])[0])
+            self._enter_phase('cart')
+            cart = self._get_cart()
+            if cart is not None:
+                cart.remove(product_id)
+            # Redirect back to the product list, preserving the category and page
+            redirect_path = f"/?{listing.query_string()}"
+            self._send_redirect(redirect_path)
+            return
+
+        elif path == '/cache_stats':
+            self._send_json({'listing': LISTING_CACHE.stats(), 'api': API_CACHE.stats()})
+            return
+
+        elif path == '/metrics':
+            body = METRICS.exposition()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self._write(body)
+            return
+
+        # The cart total is maintained incrementally by Cart
+        self._enter_phase('cart')
+        cart = self._get_cart()
+        cart_items, cart_total = cart.snapshot() if cart is not None else ([], 0.0)
+
+        # The category sidebar, product grid and pagination are the same for every
+        # visitor, so they come from the fragment cache; only the cart is rendered per request
+        self._enter_phase('catalog')
+        catalog = CATALOG
+        cache_key = (catalog.version, listing)
+        cached = LISTING_CACHE.get(cache_key)
+        if cached is None:
+            products, total = listing.products(catalog)
+
+        self._enter_phase('render')
+        query = _listing_query(listing)
+        fragments = self._render_cart_fragments(query, cart_items, cart_total)
+        if cached is not None:
+            fragments['category_items'], fragments['product_cards'], fragments['pagination'] = cached
+        else:
+            # Stream the product grid as it is rendered and cache it once complete
+            category_items = _render_category_items(catalog.categories, listing.category)
+            pagination = _render_pagination(listing, total)
+            product_cards = _iter_product_cards(products, query.encode('utf-8'))
+            fragments['category_items'] = category_items
+            fragments['product_cards'] = _stream_into_cache(cache_key, category_items, product_cards, pagination)
+            fragments['pagination'] = pagination
+
+        self._send_page(fragments)
+
+    def _send_page(self, fragments):
+        """
+        Sends the store page. If some fragments are still being produced (iterables
+        of bytes) and the client speaks HTTP/1.1, the page is streamed with chunked
+        transfer encoding so the browser can start painting before the grid is done.
+        """
+        streaming = (self.request_version == 'HTTP/1.1' and
+                     not all(isinstance(fragment, bytes) for fragment in fragments.values()))
+        self.send_response(200)
+        self.send_header("Content-type", "text/html; charset=utf-8")
+        if not streaming:
+            body = PAGE_TEMPLATE.render(**fragments)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self._write(body)
+            return
+
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        buffer = []
+        buffered = 0
+        for piece in PAGE_TEMPLATE.stream(**fragments):
+            buffer.append(piece)
+            buffered += len(piece)
+            if buffered and (piece is FLUSH or buffered >= STREAM_CHUNK_SIZE):
+                self._write_chunk(b"".join(buffer))
+                buffer.clear()
+                buffered = 0
+        if buffered:
+            self._write_chunk(b"".join(buffer))
+        self._write(b"0\r\n\r\n")
+
+    def _write_chunk(self, data):
+        self._write(b"%x\r\n%s\r\n" % (len(data), data))
+
+    # --- JSON API ---
+    def do_POST(self):
+        with self._request_metrics():
+            self._handle_api_with_body('POST')
+
+    def do_DELETE(self):
+        with self._request_metrics():
+            self._handle_api_with_body('DELETE')
+
+    def _handle_api_with_body(self, method):
+        """
+        Reads the whole request body before routing, so no response (404 and 405
+        included) leaves unread bytes that would be parsed as the next request.
+        """
+        if 'chunked' in self.headers.get('Transfer-Encoding', '').lower():
+            self.close_connection = True # Chunked bodies are not supported; their bytes stay unread
+            self._send_json({'error': 'chunked request bodies are not supported'}, 411)
+            return
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if not 0 <= length <= MAX_REQUEST_BODY:
+            self.close_connection = True # The unread body would corrupt the next request
+            self._send_json({'error': 'invalid or oversized Content-Length'}, 413 if length > 0 else 400)
+            return
+        body = self.rfile.read(length) if length else b""
+        parsed_url = urllib.parse.urlparse(self.path)
+        self._handle_api(method, parsed_url.path, urllib.parse.parse_qs(parsed_url.query), body)
+
+    def _handle_api(self, method, path, query_params, body=b""):
+        """
+        Routes the JSON API:
+          GET    /api/products        one page of the catalog (same query parameters as the HTML listing)
+          GET    /api/products/<id>   a single product
+          GET    /api/cart            the visitor's cart
+          POST   /api/cart            add {"product_id": n, "quantity": k} to the cart
+          DELETE /api/cart            remove {"product_id": n, "quantity": k} (or ?product_id=n)
+        Catalog responses are served from API_CACHE; cart updates return only what changed.
+        """
+        self._enter_phase('catalog')
+        catalog = CATALOG
+        if path == '/api/products' and method == 'GET':
+            listing = Listing.from_query(query_params)
+            self._send_json_bytes(API_CACHE.get_or_render(
+                (catalog.version, listing), lambda: self._products_payload(catalog, listing)))
+        elif path.startswith('/api/products/') and method == 'GET':
+            try:
+                product_id = int(path[len('/api/products/'):])
+            except ValueError:
+                product_id = None
+            product = catalog.get(product_id)
+            if product is None:
+                self._send_json({'error': 'product not found'}, 404)
+                return
+            self._send_json_bytes(API_CACHE.get_or_render(
+                (catalog.version, product_id), lambda: json.dumps(product).encode('utf-8')))
+        elif path == '/api/cart' and method == 'GET':
+            self._enter_phase('cart')
+            cart = self._get_cart()
+            items, total = cart.snapshot() if cart is not None else ([], 0.0)
+            self._send_json({'items': items, 'cart_total': total, 'cart_lines': len(items)})
+        elif path == '/api/cart' and method in ('POST', 'DELETE'):
+            self._update_cart_api(method, catalog, query_params, body)
+        elif path == '/api/cart':
+            self._send_json({'error': f'{method} not allowed'}, 405, {'Allow': 'GET, POST, DELETE'})
+        elif path == '/api/products' or path.startswith('/api/products/'):
+            self._send_json({'error': f'{method} not allowed'}, 405, {'Allow': 'GET'})
+        else:
+            self._send_json({'error': 'not found'}, 404)
+
+    def _update_cart_api(self, method, catalog, query_params, body):
+        """Applies a POST/DELETE on /api/cart and responds with the cart delta."""
+        try:
+            request = json.loads(body) if body else {}
+            if 'product_id' not in request and 'product_id' in query_params:
+                request['product_id'] = query_params['product_id'][0]
+            product_id = int(request['product_id'])
+            quantity = int(request.get('quantity', 1))
+        except (KeyError, TypeError, ValueError, AttributeError): # json.JSONDecodeError is a ValueError
+            self._send_json({'error': 'expected a JSON object with an integer "product_id"'}, 400)
+            return
+        if quantity < 1:
+            self._send_json({'error': '"quantity" must be at least 1'}, 400)
+            return
+
+        if method == 'POST':
+            product = catalog.get(product_id)
+            if product is None:
+                self._send_json({'error': 'product not found'}, 404)
+                return
+            self._enter_phase('cart')
+            cart = self._get_cart(create=True)
+            cart.add(product, quantity)
+        else:
+            self._enter_phase('cart')
+            cart = self._get_cart()
+            if cart is None:
+                self._send_json({'product_id': product_id, 'quantity': 0, 'cart_total': 0.0, 'cart_lines': 0})
+                return
+            cart.remove(product_id, quantity)
+        self._send_json(cart.delta(product_id))
+
+    @staticmethod
+    def _products_payload(catalog, listing):
+        products, total = listing.products(catalog)
+        return json.dumps({
+            'products': products,
+            'page': listing.page,
+            'page_size': listing.page_size,
+            'total': total,
+            'pages': max(1, -(-total // listing.page_size)),
+        }).encode('utf-8')
+
+    def _send_json_bytes(self, body, status=200, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self._write(body)
+
+    def _send_json(self, data, status=200, headers=None):
+        self._send_json_bytes(json.dumps(data).encode('utf-8'), status, headers)
+
+    @staticmethod
+    def _generate_html(products, categories, selected_category, cart, cart_total):
+        """
+        Generates the full HTML page for the given products as UTF-8 bytes,
+        on a single page and without the fragment cache.
+        """
+        listing = Listing(selected_category, 1, PAGE_SIZE, None, None)
+        return MyHandler._render_page(_render_listing(products, len(products), categories, listing),
+                                      _listing_query(listing), cart, cart_total)
+
+    @staticmethod
+    def _render_page(listing_fragments, query, cart, cart_total):
+        """Assembles the page from pre-encoded listing fragments and the visitor's cart."""
+        fragments = MyHandler._render_cart_fragments(query, cart, cart_total)
+        fragments['category_items'], fragments['product_cards'], fragments['pagination'] = listing_fragments
+        return PAGE_TEMPLATE.render(**fragments)
+
+    @staticmethod
+    def _render_cart_fragments(query, cart, cart_total):
+        """
+        Renders the per-visitor fragments (cart badge and cart panel) as bytes.
+        Everything else on the page comes pre-encoded from PAGE_TEMPLATE or the listing cache.
+        """
+        if cart:
+            cart_items = "".join([_render_cart_item(item, query) for item in cart])
+            cart_panel = CART_PANEL_TEMPLATE.render(
+                cart_items=cart_items.encode('utf-8'),
+                cart_total=f"{cart_total:.2f}".encode('utf-8'))
+        else:
+            cart_panel = CART_EMPTY_HTML
+        return {
+            'cart_badge': _render_cart_badge(len(cart)).encode('utf-8') if cart else b"",
+            'cart_panel': cart_panel,
+        }
+
+
+# --- Benchmarks ---
+def _load_baseline_renderer(path):
+    """
+    Loads the page renderer of another copy of this script, such as an older
+    commit's (git show <commit>:webApplication.py > baseline.py), as a function
+    of (products, categories, selected_category, cart, cart_total) returning bytes.
+    """
+    spec = importlib.util.spec_from_file_location("_bench_baseline", path)
+    module = importlib.util.module_from_spec(spec)
+    try:
+        spec.loader.exec_module(module)
+    except SyntaxError as e: # The original nests f-strings in a way only Python 3.12+ parses
+        raise SystemExit(f"Cannot load the baseline {path} with Python {sys.version.split()[0]}: {e}")
+    generate_html = module.MyHandler.__dict__['_generate_html']
+    if isinstance(generate_html, staticmethod):
+        generate_html = generate_html.__func__
+    else: # The original renderer was an instance method that never used self
+        generate_html = functools.partial(generate_html, None)
+
+    def render(*args):
+        page = generate_html(*args)
+        return page.encode('utf-8') if isinstance(page, str) else page # The old handler encoded after rendering
+    return render
+
+
+def bench_render(iterations=5000, baseline=None):
+    """
+    Times MyHandler._generate_html for the full catalog and a three-item cart,
+    and the renderer of the baseline copy of this script if one is given.
+    """
+    cart = [dict(product, quantity=2) for product in PRODUCTS[:3]]
+    cart_total = sum(item['price'] * item['quantity'] for item in cart)
+
+    def render():
+        return MyHandler._generate_html(PRODUCTS, CATEGORIES, 'All', cart, cart_total)
+
+    renderers = [("render", render)]
+    if baseline:
+        render_baseline = _load_baseline_renderer(baseline)
+        renderers.insert(0, (f"baseline render ({baseline})",
+                             lambda: render_baseline(PRODUCTS, CATEGORIES, 'All', cart, cart_total)))
+
+    listing = Listing('All', 1, PAGE_SIZE, None, None)
+    listing_fragments = _render_listing(PRODUCTS, len(PRODUCTS), CATEGORIES, listing)
+
+    def render_cached_listing():
+        return MyHandler._render_page(listing_fragments, _listing_query(listing), cart, cart_total)
+
+    def peak_allocation(renderer):
+        tracemalloc.start()
+        renderer()
+        tracemalloc.reset_peak()
+        page = renderer()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return peak, page
+
+    for name, renderer in renderers:
+        renderer() # Warm up
+        best = min(timeit.repeat(renderer, number=iterations, repeat=5))
+        peak, page = peak_allocation(renderer)
+        print(f"{name}: {best / iterations * 1e6:.1f} us/page, "
+              f"peak allocation {peak / 1024:.1f} KiB, page size {len(page) / 1024:.1f} KiB")
+    best_cached = min(timeit.repeat(render_cached_listing, number=iterations, repeat=5))
+    print(f"render with cached listing: {best_cached / iterations * 1e6:.1f} us/page")
+
+
+def bench_catalog(size=100_000, lookups=1000):
+    """Compares linear scans over a product list with the Catalog indexes on a synthetic catalog."""
+    rng = random.Random(42)
+    categories = [f"Category {i}" for i in range(50)]
+    products = [{
+        'id': product_id,
+        'name': f"Product {product_id}",
+        'category': rng.choice(categories),
+        'price': round(rng.uniform(1, 2000), 2),
+        'image': "https://placehold.co/150x150/F0F8FF/000000?text=Product",
+    } for product_id in range(1, size + 1)]
+
+    start = time.perf_counter()
+    catalog = Catalog(products)
+    build_time = time.perf_counter() - start
+    print(f"catalog: {size} products, index build {build_time * 1000:.0f} ms")
+
+    ids = [rng.randint(1, size) for _ in range(lookups)]
+    picks = [rng.choice(categories) for _ in range(lookups // 10)]
+    ranges = [(lo, lo + 50) for lo in (rng.uniform(1, 1900) for _ in range(lookups // 10))]
+    cases = [
+        ("lookup by id", len(ids),
+         lambda: [next((p for p in products if p['id'] == i), None) for i in ids],
+         lambda: [catalog.get(i) for i in ids]),
+        ("filter by category", len(picks),
+         lambda: [[p for p in products if p['category'] == c] for c in picks],
+         lambda: [catalog.in_category(c) for c in picks]),
+        ("price range", len(ranges),
+         lambda: [[p for p in products if lo <= p['price'] <= hi] for lo, hi in ranges],
+         lambda: [catalog.price_range(lo, hi) for lo, hi in ranges]),
+    ]
+    for name, count, scan, indexed in cases:
+        scan_time = min(timeit.repeat(scan, number=1, repeat=3)) / count
+        indexed_time = min(timeit.repeat(indexed, number=1, repeat=3)) / count
+        print(f"{name:>20}: scan {scan_time * 1e6:10.1f} us/op, "
+              f"indexed {indexed_time * 1e6:8.2f} us/op ({scan_time / indexed_time:,.0f}x)")
 
 
 # --- Main Server Setup ---
-def run_server():
-    """Starts the HTTP server."""
-    with socketserver.TCPServer(("", PORT), MyHandler) as httpd:
-        print(f"Serving at http://localhost:{PORT}")
+class StoreHTTPServer(http.server.HTTPServer):
+    """Base of the serving modes: runs the access log writer from activation until the server is closed."""
+    allow_reuse_address = True
+    _access_log_open = False
+
+    def server_activate(self):
+        super().server_activate()
+        _open_access_log()
+        self._access_log_open = True
+
+    def server_close(self):
+        """Stops listening, waits for the connections still being served, then closes the access log."""
+        super().server_close()
+        self.finish_connections()
+        if self._access_log_open:
+            self._access_log_open = False
+            _close_access_log() # Writes out any queued log lines
+
+    def finish_connections(self):
+        """Waits for connections that are still being served (none outside serve_forever here)."""
+
+
+class SingleThreadHTTPServer(StoreHTTPServer):
+    """
+    The original serving mode: one connection at a time, closed after each response.
+    Useful as a baseline and for debugging.
+    """
+    keep_alive = False
+    shutting_down = False
+
+    def __init__(self, server_address, handler_class, backlog=LISTEN_BACKLOG):
+        self.request_queue_size = backlog
+        super().__init__(server_address, handler_class)
+
+
+class ThreadPoolHTTPServer(StoreHTTPServer):
+    """
+    Serves each accepted connection on a bounded pool of worker threads.
+
+    When every worker is busy the accept loop stops taking new connections,
+    so the excess waits in the kernel's listen backlog instead of piling up
+    in memory. Connections are kept alive between requests, but a worker only
+    holds a connection while it has a request to serve: idle connections are
+    watched by a selector thread and go back to the pool once they become
+    readable, or are closed after KEEPALIVE_TIMEOUT seconds.
+    """
+    keep_alive = True
+    parks_idle_connections = True
+
+    def __init__(self, server_address, handler_class, max_workers=MAX_WORKERS, backlog=LISTEN_BACKLOG):
+        self.request_queue_size = backlog
+        self.shutting_down = False
+        self._worker_slots = threading.BoundedSemaphore(max_workers)
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="store-worker")
+        # Idle connections are handed to the watcher thread through a queue plus a wakeup socket
+        self._parked = queue.SimpleQueue()
+        self._wakeup_receiver, self._wakeup_sender = socket.socketpair()
+        self._wakeup_sender.setblocking(False)
+        self._idle_closing = False
+        self._idle_watcher = threading.Thread(target=self._watch_idle_connections,
+                                              name="store-keepalive", daemon=True)
+        self._idle_watcher.start()
+        super().__init__(server_address, handler_class) # Closes everything again if binding fails
+
+    def finish_request(self, request, client_address):
+        return self.RequestHandlerClass(request, client_address, self)
+
+    def process_request(self, request, client_address):
+        """Hands the connection to a free worker, waiting for one if necessary."""
+        self._worker_slots.acquire()
+        try:
+            self._executor.submit(self._process_request_worker, request, client_address)
+        except RuntimeError: # Executor already shut down
+            self._worker_slots.release()
+            self.shutdown_request(request)
+
+    def _process_request_worker(self, request, client_address):
+        idle = False
+        try:
+            handler = self.finish_request(request, client_address)
+            idle = handler.idle and not self.shutting_down
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self._worker_slots.release()
+            if idle:
+                self._park(request, client_address)
+            else:
+                self.shutdown_request(request)
+
+    def _park(self, request, client_address):
+        """Hands an idle keep-alive connection to the watcher thread."""
+        self._parked.put((request, client_address))
+        self._wake_watcher()
+
+    def _wake_watcher(self):
+        try:
+            self._wakeup_sender.send(b"\0")
+        except BlockingIOError:
+            pass # Plenty of wakeups are already pending
+
+    def _watch_idle_connections(self):
+        """
+        Waits for idle connections to become readable and dispatches them to the pool
+        again. Runs on its own thread and owns the selector.
+        """
+        selector = selectors.DefaultSelector()
+        selector.register(self._wakeup_receiver, selectors.EVENT_READ)
+        # Parked connection -> deadline. Every connection gets the same timeout, so
+        # insertion order is deadline order; a dispatched connection is removed.
+        deadlines = {}
+        while not self._idle_closing:
+            try:
+                self._dispatch_idle_connections(selector, deadlines)
+            except Exception: # One broken connection must not stop keep-alive for all the others
+                self.handle_error(None, None)
+        for request in deadlines:
+            self.shutdown_request(request)
+        selector.close()
+
+    def _dispatch_idle_connections(self, selector, deadlines):
+        """One round of the watcher: dispatch readable connections, park new ones, expire old ones."""
+        timeout = max(0.0, next(iter(deadlines.values())) - time.monotonic()) if deadlines else None
+        for key, _ in selector.select(timeout):
+            if key.fileobj is self._wakeup_receiver:
+                self._wakeup_receiver.recv(4096)
+                continue
+            selector.unregister(key.fileobj)
+            del deadlines[key.fileobj]
+            self.process_request(key.fileobj, key.data) # Blocks while every worker is busy
+        while True:
+            try:
+                request, client_address = self._parked.get_nowait()
+            except queue.Empty:
+                break
+            if request.fileno() == -1: # Closed in the meantime
+                continue
+            selector.register(request, selectors.EVENT_READ, client_address)
+            deadlines[request] = time.monotonic() + KEEPALIVE_TIMEOUT
+        now = time.monotonic()
+        for request, deadline in list(deadlines.items()):
+            if deadline > now:
+                break
+            del deadlines[request]
+            if request.fileno() != -1:
+                selector.unregister(request)
+            self.shutdown_request(request)
+
+    def server_close(self):
+        self.shutting_down = True
+        super().server_close()
+
+    def finish_connections(self):
+        """Waits for in-flight requests to finish, then closes idle connections."""
+        self._executor.shutdown(wait=True)
+        self._idle_closing = True
+        self._wake_watcher()
+        self._idle_watcher.join()
+        self._wakeup_receiver.close()
+        self._wakeup_sender.close()
+
+
+def make_server(port=PORT, mode=SERVING_MODE, max_workers=MAX_WORKERS, backlog=LISTEN_BACKLOG, host=""):
+    """Creates (but does not start) the HTTP server for the chosen serving mode."""
+    if mode == "threaded":
+        return ThreadPoolHTTPServer((host, port), MyHandler, max_workers=max_workers, backlog=backlog)
+    if mode == "single":
+        return SingleThreadHTTPServer((host, port), MyHandler, backlog=backlog)
+    raise ValueError(f"Unknown serving mode: {mode!r}")
+
+
+def run_server(port=PORT, mode=SERVING_MODE, max_workers=MAX_WORKERS, backlog=LISTEN_BACKLOG):
+    """Starts the HTTP server and shuts it down gracefully on SIGINT/SIGTERM."""
+    httpd = make_server(port, mode, max_workers, backlog)
+
+    def request_shutdown(signum, frame):
+        # shutdown() blocks until serve_forever() returns, so it must run on another thread
+        httpd.shutting_down = True
+        threading.Thread(target=httpd.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGINT, request_shutdown)
+    signal.signal(signal.SIGTERM, request_shutdown)
+
+    with httpd:
+        print(f"Serving at http://localhost:{port} ({mode} mode)")
         httpd.serve_forever()
+    print("Server stopped.")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="My Python Online Store")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--mode", choices=["threaded", "single"], default=SERVING_MODE,
+                        help="serving mode (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS,
+                        help="worker threads in threaded mode (default: %(default)s)")
+    parser.add_argument("--backlog", type=int, default=LISTEN_BACKLOG,
+                        help="listen backlog (default: %(default)s)")
+    parser.add_argument("--catalog", metavar="PATH",
+                        help="load products from a .json or .csv file instead of the built-in sample")
+    parser.add_argument("--bench-render", action="store_true",
+                        help="run the page rendering microbenchmark and exit")
+    parser.add_argument("--bench-baseline", metavar="PATH",
+                        help="with --bench-render, also time the renderer of another copy of this script, "
+                             "e.g. from git show <commit>:webApplication.py (the original needs Python 3.12+)")
+    parser.add_argument("--bench-catalog", action="store_true",
+                        help="compare linear scans with the catalog indexes and exit")
+    return parser.parse_args()
+
 
 if __name__ == '__main__':
-    run_server()
\ No newline at end of file
+    args = parse_args()
+    if args.catalog:
+        load_catalog(args.catalog)
+    if args.bench_render:
+        bench_render(baseline=args.bench_baseline)
+    elif args.bench_catalog:
+        bench_catalog()
+    else:
+        run_server(args.port, args.mode, args.workers, args.backlog)
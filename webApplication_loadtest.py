@@ -0,0 +1,288 @@
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+# --- Configuration ---
+HOST = "127.0.0.1"
+PORT = 8010 # Port the server under test is started on
+CLIENTS = 32 # Concurrent client connections (the server's default worker count)
+DURATION = 20.0 # Seconds of measured load
+WARMUP = 2.0 # Seconds of load before measuring starts (fills caches, opens connections)
+RESULTS_FILE = "loadtest_results.jsonl" # One JSON object is appended per run
+
+# Request mix: URL path -> relative weight. "{product_id}" is replaced with a random product id.
+DEFAULT_MIX = {
+    "/": 40,
+    "/?category=Electronics": 30,
+    "/add_to_cart?product_id={product_id}&category=All": 15,
+    "/remove_from_cart?product_id={product_id}&category=All": 15,
+}
+PRODUCT_IDS = range(1, 11) # Ids in the built-in sample catalog
+
+
+def catalog_product_ids(path):
+    """Returns the product ids of a catalog file, loaded the same way the server loads it."""
+    from webApplication import Catalog
+    return [product['id'] for product in Catalog.load(path).products]
+
+
+def parse_mix(text):
+    """Parses 'path=weight,path=weight' into a mix dict (a path may itself contain '=')."""
+    mix = {}
+    for item in text.split(','):
+        path, _, weight = item.strip().rpartition('=')
+        mix[path] = float(weight)
+    return mix
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def latency_summary(latencies):
+    """Summarizes latencies (seconds) as milliseconds."""
+    values = sorted(latencies)
+    summary = {'count': len(values)}
+    for name, pct in (('p50', 50), ('p95', 95), ('p99', 99)):
+        value = percentile(values, pct)
+        summary[f'{name}_ms'] = round(value * 1000, 3) if value is not None else None
+    summary['max_ms'] = round(values[-1] * 1000, 3) if values else None
+    return summary
+
+
+# --- Server Under Test ---
+def start_server(port, mode, workers, catalog=None):
+    """Starts webApplication.py in a child process and waits until it accepts connections."""
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "webApplication.py")
+    command = [sys.executable, script, "--port", str(port), "--mode", mode, "--workers", str(workers)]
+    if catalog:
+        command += ["--catalog", catalog]
+    # The access log is discarded so the server is not slowed down by a terminal
+    server = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"server exited with status {server.returncode}")
+        try:
+            socket.create_connection((HOST, port), timeout=0.2).close()
+            return server
+        except OSError:
+            time.sleep(0.05)
+    server.kill()
+    raise RuntimeError("server did not start listening within 10 seconds")
+
+
+def stop_server(server):
+    """Asks the server to shut down gracefully, killing it if it does not."""
+    server.send_signal(signal.SIGTERM)
+    try:
+        server.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        server.kill()
+        server.wait()
+
+
+# --- Load Generation ---
+class Client(threading.Thread):
+    """
+    One simulated browser: a keep-alive connection with its own session cookie,
+    sending requests from the mix back to back (redirects are not followed).
+    A request counts toward the results if it completes inside the measured window,
+    whenever it started; one still running when the window closes counts as unfinished.
+    """
+    def __init__(self, port, mix, measure_from, stop_at, seed, product_ids=PRODUCT_IDS):
+        super().__init__(daemon=True)
+        self.port = port
+        self.paths = list(mix)
+        self.weights = list(mix.values())
+        self.measure_from = measure_from
+        self.stop_at = stop_at
+        self.product_ids = product_ids
+        self.rng = random.Random(seed)
+        self.cookie = None
+        self.latencies = {} # path template -> [seconds]
+        self.errors = {} # error description -> count
+        self.bytes_received = 0
+        self.straddling = 0 # Started during warmup, completed in the measured window
+        self.unfinished = 0 # Still running when the measured window closed
+
+    def run(self):
+        connection = http.client.HTTPConnection(HOST, self.port, timeout=30)
+        while True:
+            start = time.perf_counter()
+            if start >= self.stop_at:
+                break
+            template = self.rng.choices(self.paths, self.weights)[0]
+            path = template.replace("{product_id}", str(self.rng.choice(self.product_ids)))
+            headers = {"Cookie": self.cookie} if self.cookie else {}
+            try:
+                connection.request("GET", path, headers=headers)
+                response = connection.getresponse()
+                body = response.read()
+            except (OSError, http.client.HTTPException) as e:
+                self._record_error(type(e).__name__)
+                connection.close() # http.client reconnects on the next request
+                continue
+            end = time.perf_counter()
+            elapsed = end - start
+
+            set_cookie = response.getheader("Set-Cookie")
+            if set_cookie:
+                self.cookie = set_cookie.split(';', 1)[0]
+            if end < self.measure_from:
+                continue
+            if end >= self.stop_at:
+                self.unfinished += 1
+                continue
+            if start < self.measure_from:
+                self.straddling += 1
+            if response.status >= 400:
+                self._record_error(f"HTTP {response.status}")
+            self.latencies.setdefault(template, []).append(elapsed)
+            self.bytes_received += len(body)
+        connection.close()
+
+    def completed(self):
+        return sum(len(values) for values in self.latencies.values())
+
+    def _record_error(self, description):
+        if self.measure_from <= time.perf_counter() < self.stop_at:
+            self.errors[description] = self.errors.get(description, 0) + 1
+
+
+def run_load(port, mix, clients, duration, warmup, product_ids=PRODUCT_IDS):
+    """Drives the server with the given mix and returns the per-client results."""
+    now = time.perf_counter()
+    measure_from = now + warmup
+    stop_at = measure_from + duration
+    threads = [Client(port, mix, measure_from, stop_at, seed, product_ids) for seed in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return threads
+
+
+def summarize(threads, duration):
+    """Combines per-client measurements into throughput and latency figures."""
+    by_route = {}
+    errors = {}
+    bytes_received = 0
+    for thread in threads:
+        for template, values in thread.latencies.items():
+            by_route.setdefault(template, []).extend(values)
+        for description, count in thread.errors.items():
+            errors[description] = errors.get(description, 0) + count
+        bytes_received += thread.bytes_received
+    all_latencies = [value for values in by_route.values() for value in values]
+    # Starved clients hide behind a healthy total, so the spread across clients is reported too
+    per_client = sorted(thread.completed() for thread in threads)
+    return {
+        'requests': len(all_latencies),
+        'straddling_requests': sum(thread.straddling for thread in threads),
+        'unfinished_requests': sum(thread.unfinished for thread in threads),
+        'per_client': {
+            'min': per_client[0] if per_client else None,
+            'median': percentile(per_client, 50),
+            'max': per_client[-1] if per_client else None,
+            'idle_clients': sum(1 for count in per_client if count == 0),
+        },
+        'throughput_rps': round(len(all_latencies) / duration, 1),
+        'received_mib_per_s': round(bytes_received / duration / 2**20, 2),
+        'latency': latency_summary(all_latencies),
+        'routes': {template: latency_summary(values) for template, values in sorted(by_route.items())},
+        'errors': errors,
+    }
+
+
+def print_report(result):
+    summary = result['summary']
+    print(f"\n{summary['requests']} requests in {result['config']['duration']:.0f}s "
+          f"with {result['config']['clients']} clients ({result['config']['mode']} mode): "
+          f"{summary['throughput_rps']} req/s, {summary['received_mib_per_s']} MiB/s")
+    print(f"{'route':<58}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    rows = list(summary['routes'].items()) + [("all", summary['latency'])]
+    for route, stats in rows:
+        print(f"{route:<58}{stats['count']:>8}{stats['p50_ms']:>10}{stats['p95_ms']:>10}"
+              f"{stats['p99_ms']:>10}{stats['max_ms']:>10}")
+    per_client = summary['per_client']
+    print(f"per client: min {per_client['min']}, median {per_client['median']}, max {per_client['max']} "
+          f"requests; {per_client['idle_clients']} clients completed none")
+    print(f"{summary['straddling_requests']} requests started during warmup, "
+          f"{summary['unfinished_requests']} were still running at the end")
+    if summary['errors']:
+        print(f"errors: {summary['errors']}")
+
+
+def save_result(result, path):
+    """Appends the run to a JSON Lines file so runs can be compared over time."""
+    with open(path, "a", encoding="utf-8") as file:
+        file.write(json.dumps(result) + "\n")
+    print(f"Results appended to {path}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load test for the webApplication store server")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--mode", choices=["threaded", "single"], default="threaded",
+                        help="serving mode of the server under test (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=32,
+                        help="server worker threads in threaded mode (default: %(default)s)")
+    parser.add_argument("--catalog", metavar="PATH", help="catalog file passed to the server")
+    parser.add_argument("--clients", type=int, default=CLIENTS,
+                        help="concurrent client connections (default: %(default)s)")
+    parser.add_argument("--duration", type=float, default=DURATION,
+                        help="measured seconds of load (default: %(default)s)")
+    parser.add_argument("--warmup", type=float, default=WARMUP,
+                        help="unmeasured seconds of load first (default: %(default)s)")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                        help="request mix as 'path=weight,...' (default: %s)" %
+                             ",".join(f"{path}={weight}" for path, weight in DEFAULT_MIX.items()))
+    parser.add_argument("--label", default="", help="free-form label stored with the results")
+    parser.add_argument("--output", default=RESULTS_FILE,
+                        help="JSON Lines results file to append to (default: %(default)s)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    config = {
+        'label': args.label,
+        'mode': args.mode,
+        'workers': args.workers,
+        'catalog': args.catalog,
+        'clients': args.clients,
+        'duration': args.duration,
+        'warmup': args.warmup,
+        'mix': args.mix,
+    }
+    product_ids = catalog_product_ids(args.catalog) if args.catalog else PRODUCT_IDS
+    print(f"Starting server on port {args.port} ({args.mode} mode)...")
+    server = start_server(args.port, args.mode, args.workers, args.catalog)
+    try:
+        print(f"Running {args.clients} clients for {args.warmup:.0f}s warmup + {args.duration:.0f}s...")
+        threads = run_load(args.port, args.mix, args.clients, args.duration, args.warmup, product_ids)
+    finally:
+        stop_server(server)
+
+    result = {
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        'host': {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count()},
+        'config': config,
+        'summary': summarize(threads, args.duration),
+    }
+    print_report(result)
+    save_result(result, args.output)